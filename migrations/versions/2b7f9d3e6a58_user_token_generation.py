@@ -0,0 +1,37 @@
+"""user token generation
+
+Revision ID: 2b7f9d3e6a58
+Revises: d5e2b8a4c196
+Create Date: 2026-10-18 18:31:12.804517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b7f9d3e6a58'
+down_revision: Union[str, Sequence[str], None] = 'd5e2b8a4c196'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column(
+            'token_generation',
+            sa.INTEGER(),
+            nullable=False,
+            server_default='0'
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_generation')
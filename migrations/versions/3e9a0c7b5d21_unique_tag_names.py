@@ -0,0 +1,54 @@
+"""unique tag names
+
+Revision ID: 3e9a0c7b5d21
+Revises: b81f4e6c2a07
+Create Date: 2026-10-18 11:26:54.081337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e9a0c7b5d21'
+down_revision: Union[str, Sequence[str], None] = 'b81f4e6c2a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DUPLICATE_TAGS = """
+    SELECT id, first_value(id) OVER (
+        PARTITION BY name ORDER BY created_at, id
+    ) AS keep_id
+    FROM tags
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fold duplicate tag names into the oldest tag before enforcing
+    # uniqueness, moving their book links across.
+    op.execute(f"""
+        INSERT INTO booktag (book_id, tag_id)
+        SELECT booktag.book_id, dup.keep_id
+        FROM booktag JOIN ({DUPLICATE_TAGS}) AS dup
+            ON booktag.tag_id = dup.id
+        WHERE dup.id <> dup.keep_id
+        ON CONFLICT DO NOTHING
+    """)
+    op.execute(f"""
+        DELETE FROM booktag USING ({DUPLICATE_TAGS}) AS dup
+        WHERE booktag.tag_id = dup.id AND dup.id <> dup.keep_id
+    """)
+    op.execute(f"""
+        DELETE FROM tags USING ({DUPLICATE_TAGS}) AS dup
+        WHERE tags.id = dup.id AND dup.id <> dup.keep_id
+    """)
+    op.create_index('ix_tags_name', 'tags', ['name'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tags_name', table_name='tags')
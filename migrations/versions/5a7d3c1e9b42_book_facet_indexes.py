@@ -0,0 +1,52 @@
+"""book facet indexes
+
+Revision ID: 5a7d3c1e9b42
+Revises: 9d4b6f1a8e35
+Create Date: 2026-10-18 15:02:17.604913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a7d3c1e9b42'
+down_revision: Union[str, Sequence[str], None] = '9d4b6f1a8e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_books_language_created_at_id',
+        'books',
+        ['language', 'created_at', 'id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_books_publisher_created_at_id',
+        'books',
+        ['publisher', 'created_at', 'id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_books_published_date', 'books', ['published_date'], unique=False
+    )
+    op.create_index(
+        'ix_booktag_tag_id_book_id',
+        'booktag',
+        ['tag_id', 'book_id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_booktag_tag_id_book_id', table_name='booktag')
+    op.drop_index('ix_books_published_date', table_name='books')
+    op.drop_index('ix_books_publisher_created_at_id', table_name='books')
+    op.drop_index('ix_books_language_created_at_id', table_name='books')
@@ -0,0 +1,38 @@
+"""books keyset indexes
+
+Revision ID: 7c2e5a9d1f3b
+Revises: f4014a0c9d5a
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e5a9d1f3b'
+down_revision: Union[str, Sequence[str], None] = 'f4014a0c9d5a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_books_created_at_id', 'books', ['created_at', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_books_user_id_created_at_id',
+        'books',
+        ['user_id', 'created_at', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_user_id_created_at_id', table_name='books')
+    op.drop_index('ix_books_created_at_id', table_name='books')
@@ -0,0 +1,36 @@
+"""review user rating index
+
+Revision ID: 7e4c1a9b3d62
+Revises: 2b7f9d3e6a58
+Create Date: 2026-10-18 19:02:47.315920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e4c1a9b3d62'
+down_revision: Union[str, Sequence[str], None] = '2b7f9d3e6a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_reviews_user_id_rating_created_at_id',
+        'reviews',
+        ['user_id', 'rating', 'created_at', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_reviews_user_id_rating_created_at_id', table_name='reviews'
+    )
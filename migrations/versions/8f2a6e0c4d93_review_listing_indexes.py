@@ -0,0 +1,50 @@
+"""review listing indexes
+
+Revision ID: 8f2a6e0c4d93
+Revises: e1b7c4f92a60
+Create Date: 2026-10-18 16:55:40.127388
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2a6e0c4d93'
+down_revision: Union[str, Sequence[str], None] = 'e1b7c4f92a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_reviews_book_id_created_at_id',
+        'reviews',
+        ['book_id', 'created_at', 'id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_reviews_user_id_created_at_id',
+        'reviews',
+        ['user_id', 'created_at', 'id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_reviews_book_id_rating_created_at_id',
+        'reviews',
+        ['book_id', 'rating', 'created_at', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_reviews_book_id_rating_created_at_id', table_name='reviews'
+    )
+    op.drop_index('ix_reviews_user_id_created_at_id', table_name='reviews')
+    op.drop_index('ix_reviews_book_id_created_at_id', table_name='reviews')
@@ -0,0 +1,81 @@
+"""book rating aggregates
+
+Revision ID: 9d4b6f1a8e35
+Revises: 3e9a0c7b5d21
+Create Date: 2026-10-18 12:41:09.774120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b6f1a8e35'
+down_revision: Union[str, Sequence[str], None] = '3e9a0c7b5d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('books', sa.Column(
+        'review_count', sa.INTEGER(), server_default='0', nullable=False
+    ))
+    op.add_column('books', sa.Column(
+        'rating_sum', sa.INTEGER(), server_default='0', nullable=False
+    ))
+    op.create_table('book_rating_counts',
+    sa.Column('book_id', sa.Uuid(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('book_id', 'rating')
+    )
+
+    # Backfill from the existing reviews.
+    op.execute("""
+        UPDATE books
+        SET review_count = agg.review_count, rating_sum = agg.rating_sum
+        FROM (
+            SELECT book_id, count(*) AS review_count, sum(rating) AS rating_sum
+            FROM reviews
+            WHERE book_id IS NOT NULL
+            GROUP BY book_id
+        ) AS agg
+        WHERE books.id = agg.book_id
+    """)
+    op.execute("""
+        INSERT INTO book_rating_counts (book_id, rating, count)
+        SELECT book_id, rating, count(*)
+        FROM reviews
+        WHERE book_id IS NOT NULL
+        GROUP BY book_id, rating
+    """)
+
+    op.create_index(
+        'ix_books_rating_rank_id',
+        'books',
+        [
+            sa.text('(CAST(rating_sum AS FLOAT) / greatest(review_count, 1))'),
+            'id',
+        ],
+        unique=False
+    )
+    op.create_index(
+        'ix_books_review_count_id',
+        'books',
+        ['review_count', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_review_count_id', table_name='books')
+    op.drop_index('ix_books_rating_rank_id', table_name='books')
+    op.drop_table('book_rating_counts')
+    op.drop_column('books', 'rating_sum')
+    op.drop_column('books', 'review_count')
@@ -0,0 +1,32 @@
+"""unique user email
+
+Revision ID: a6c9e3f1b742
+Revises: 8f2a6e0c4d93
+Create Date: 2026-10-18 17:42:08.519263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c9e3f1b742'
+down_revision: Union[str, Sequence[str], None] = '8f2a6e0c4d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Signup already refused known emails, so duplicates can only come
+    # from racing signups. They own books and reviews and can't be folded
+    # automatically: if this fails, resolve them by hand and re-run.
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_email', table_name='users')
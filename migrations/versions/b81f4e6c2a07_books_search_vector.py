@@ -0,0 +1,46 @@
+"""books search vector
+
+Revision ID: b81f4e6c2a07
+Revises: 7c2e5a9d1f3b
+Create Date: 2026-10-18 10:03:17.552981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4e6c2a07'
+down_revision: Union[str, Sequence[str], None] = '7c2e5a9d1f3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A')"
+    " || setweight(to_tsvector('english', coalesce(author, '')), 'B')"
+    " || setweight(to_tsvector('english', coalesce(publisher, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "ALTER TABLE books ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+    )
+    op.create_index(
+        'ix_books_search_vector',
+        'books',
+        ['search_vector'],
+        unique=False,
+        postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_search_vector', table_name='books')
+    op.drop_column('books', 'search_vector')
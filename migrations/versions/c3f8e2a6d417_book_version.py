@@ -0,0 +1,34 @@
+"""book version
+
+Revision ID: c3f8e2a6d417
+Revises: 5a7d3c1e9b42
+Create Date: 2026-10-18 15:48:33.271905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8e2a6d417'
+down_revision: Union[str, Sequence[str], None] = '5a7d3c1e9b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'books',
+        sa.Column(
+            'version', sa.INTEGER(), server_default='1', nullable=False
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('books', 'version')
@@ -0,0 +1,34 @@
+"""user role version
+
+Revision ID: d5e2b8a4c196
+Revises: a6c9e3f1b742
+Create Date: 2026-10-18 18:05:31.276904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e2b8a4c196'
+down_revision: Union[str, Sequence[str], None] = 'a6c9e3f1b742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column(
+            'role_version', sa.INTEGER(), nullable=False, server_default='0'
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'role_version')
@@ -0,0 +1,44 @@
+"""cascade book deletes
+
+Revision ID: e1b7c4f92a60
+Revises: c3f8e2a6d417
+Create Date: 2026-10-18 16:21:05.913462
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b7c4f92a60'
+down_revision: Union[str, Sequence[str], None] = 'c3f8e2a6d417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (constraint, table, column, referred table)
+FOREIGN_KEYS = (
+    ('reviews_book_id_fkey', 'reviews', 'book_id', 'books'),
+    ('booktag_book_id_fkey', 'booktag', 'book_id', 'books'),
+    ('booktag_tag_id_fkey', 'booktag', 'tag_id', 'tags'),
+)
+
+
+def _replace_foreign_keys(ondelete) -> None:
+    for name, table, column, referred in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(
+            name, table, referred, [column], ['id'], ondelete=ondelete
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_foreign_keys(None)
@@ -1,12 +1,24 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.auth.revocations import sync_revocations
 from src.auth.routes import auth_router
+from src.auth.utils import password_hasher
+from src.books.autocomplete import book_index, sync_autocomplete
+from src.books.recommendations import (
+    recommender, retrain_periodically, shutdown_pool
+)
 from src.books.routes import book_router
+from src.books.similarity import (
+    rebuild_similar_periodically, warm_similar_books
+)
+from src.books.trending import warm_trending
 from src.reviews.routes import review_router
 from src.tags.routes import tags_router
-from src.db.main import init_db
+from src.db.main import async_engine, init_db
 from src.middleware import register_middleware
 
 
@@ -14,7 +26,23 @@ from src.middleware import register_middleware
 async def life_span(app: FastAPI):
     print("Server is starting...")
     await init_db()
+    async with AsyncSession(async_engine) as session:
+        await book_index.load(session)
+        await warm_trending(session)
+        await warm_similar_books(session)
+    print(f"Autocomplete index loaded: {book_index.stats()}")
+    recommender.reload(force=True)
+    retrain_task = asyncio.create_task(retrain_periodically())
+    revocations_task = asyncio.create_task(sync_revocations())
+    similar_task = asyncio.create_task(rebuild_similar_periodically())
+    autocomplete_task = asyncio.create_task(sync_autocomplete())
     yield
+    autocomplete_task.cancel()
+    retrain_task.cancel()
+    similar_task.cancel()
+    revocations_task.cancel()
+    shutdown_pool()
+    password_hasher.shutdown()
     print("Server has been stopped...")
 
 
@@ -6,11 +6,12 @@ from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.auth.revocations import revocation_filter
+from src.auth.schemas import UserPrincipalModel
 from src.auth.services import UserService
-from src.auth.utils import decode_token
+from src.auth.token_cache import token_cache
 from src.db.main import get_session
-from src.db.models import User
-from src.db.redis import token_in_blocklist
+from src.db.redis import token_revoked
 
 user_service = UserService()
 
@@ -24,9 +25,21 @@ class TokenBearer(HTTPBearer):
             ) -> HTTPAuthorizationCredentials | None:
         creds = await super().__call__(request)
         token = creds.credentials
-        token_data = decode_token(token)
+        # Several bearer instances run per request (the route's own and the
+        # one behind get_current_user); the first verifies, the rest reuse.
+        verified = getattr(request.state, "verified_token", None)
+        if verified is not None and verified[0] == token:
+            token_data = verified[1]
+        else:
+            token_data = await self.verify_token(token)
+            request.state.verified_token = (token, token_data)
+        self.verify_token_data(token_data)
+        return token_data
+
+    async def verify_token(self, token: str) -> dict:
+        token_data = token_cache.verify(token)
 
-        if not self.validate_token(token):
+        if token_data is None:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail={
@@ -34,7 +47,21 @@ class TokenBearer(HTTPBearer):
                     "resolution": "Please acquire a new token"
                 }
             )
-        if await token_in_blocklist(token_data['jti']):
+        if not revocation_filter.might_be_revoked(token_data):
+            # Nothing revoked under this token's keys: no Redis lookup.
+            revoked = False
+        else:
+            # Tokens from before a "log out everywhere" are refused, and
+            # access tokens from before a role change too, so their role
+            # claim can be trusted as current.
+            user = token_data["user"]
+            revoked = await token_revoked(
+                token_data["jti"],
+                user["user_id"],
+                user.get("token_generation", 0),
+                None if token_data["refresh"] else user.get("role_version", 0),
+            )
+        if revoked:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail={
@@ -42,13 +69,8 @@ class TokenBearer(HTTPBearer):
                     "resolution": "Please acquire a new token"
                 }
             )
-        self.verify_token_data(token_data)
         return token_data
 
-    def validate_token(self, token: str) -> bool:
-        token_data = decode_token(token)
-        return token_data is not None
-
     def verify_token_data(self, token_data: str) -> None:
         raise NotImplementedError(
             "Please override this method in child classes."
@@ -76,18 +98,38 @@ class RefreshTokenBearer(TokenBearer):
 async def get_current_user(
     token_details: dict = Depends(AccessTokenBearer()),
     session: AsyncSession = Depends(get_session),
-):
-    user_email = token_details["user"]["email"]
-    user = await user_service.get_user_by_email(user_email, session)
-    return user
+) -> UserPrincipalModel:
+    user_id = token_details["user"]["user_id"]
+    principal = await user_service.get_principal(user_id, session)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User not found.",
+        )
+    return principal
 
 
 class RoleChecker:
-    def __init__(self, allowed_roles: List[str]) -> None:
+    # from_claims authorizes from the verified access token alone. The
+    # role_version check in TokenBearer keeps that claim current; the
+    # default mode still resolves the user's principal.
+    def __init__(
+        self, allowed_roles: List[str], from_claims: bool = False
+    ) -> None:
         self.allowed_roles = allowed_roles
+        self.from_claims = from_claims
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> Any:
-        if current_user.role in self.allowed_roles:
+    async def __call__(
+        self,
+        token_details: dict = Depends(AccessTokenBearer()),
+        session: AsyncSession = Depends(get_session),
+    ) -> Any:
+        if self.from_claims:
+            role = token_details["user"].get("role")
+        else:
+            current_user = await get_current_user(token_details, session)
+            role = current_user.role
+        if role in self.allowed_roles:
             return True
 
         raise HTTPException(
@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import Iterable, Optional
+
+from src.config import Config
+from src.db.redis import (
+    REVOCATIONS_CHANNEL,
+    revocations_pubsub,
+    role_version_key,
+    scan_revocations,
+    token_generation_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rebuilding from Redis drops keys that have since expired there, which
+# keeps the filter from filling up with dead entries.
+RESYNC_SECONDS = 3600
+RETRY_SECONDS = 5
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(
+            8,
+            int(-capacity * math.log(error_rate) / math.log(2) ** 2),
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from one 128-bit digest.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+def build_filter(keys: Iterable[str]) -> BloomFilter:
+    keys = list(keys)
+    bloom = BloomFilter(
+        max(Config.REVOCATION_FILTER_CAPACITY, 2 * len(keys)),
+        Config.REVOCATION_FILTER_ERROR_RATE,
+    )
+    for key in keys:
+        bloom.add(key)
+    return bloom
+
+
+# Per-worker set of possibly revoked JTIs and role-version keys, so the
+# common "not revoked" case needs no Redis round trip. Until it has been
+# synced (and whenever the subscription drops) every lookup is a maybe.
+class RevocationFilter:
+    def __init__(self) -> None:
+        self._filter: Optional[BloomFilter] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    def reset(self) -> None:
+        self._filter = None
+
+    async def rebuild(self) -> None:
+        # Built off the event loop. Keys revoked meanwhile are in the scan
+        # or still queued on the subscription, so swapping loses nothing.
+        keys = await scan_revocations()
+        self._filter = await asyncio.to_thread(build_filter, keys)
+
+    def add(self, key: str) -> None:
+        if self._filter is not None:
+            self._filter.add(key)
+
+    def might_be_revoked(self, token_data: dict) -> bool:
+        bloom = self._filter
+        if bloom is None:
+            return True
+        if token_data["jti"] in bloom:
+            return True
+        user_id = token_data["user"].get("user_id")
+        if user_id is None:
+            return False
+        return token_generation_key(user_id) in bloom or (
+            not token_data["refresh"] and role_version_key(user_id) in bloom
+        )
+
+
+revocation_filter = RevocationFilter()
+
+
+async def _follow(pubsub) -> None:
+    # Subscribed before scanning, so revocations published during the scan
+    # wait in the connection and are applied right after it.
+    await pubsub.subscribe(REVOCATIONS_CHANNEL)
+    await revocation_filter.rebuild()
+    synced_at = time.monotonic()
+    while True:
+        message = await pubsub.get_message(
+            ignore_subscribe_messages=True, timeout=1.0
+        )
+        if message is not None:
+            revocation_filter.add(message["data"].decode())
+        if time.monotonic() - synced_at > RESYNC_SECONDS:
+            await revocation_filter.rebuild()
+            synced_at = time.monotonic()
+
+
+async def sync_revocations() -> None:
+    while True:
+        pubsub = revocations_pubsub()
+        try:
+            await _follow(pubsub)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Revocation sync failed")
+        finally:
+            # Missed messages can't be replayed: fall back to Redis until
+            # the next full resync.
+            revocation_filter.reset()
+            await pubsub.close()
+        await asyncio.sleep(RETRY_SECONDS)
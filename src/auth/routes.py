@@ -1,6 +1,9 @@
+import time
+import uuid
 from datetime import datetime, timedelta
+from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from fastapi.exceptions import HTTPException
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio.session import AsyncSession
@@ -12,18 +15,36 @@ from src.auth.dependencies import (
     get_current_user,
 )
 from src.auth.schemas import (
-    UserBooksModel, UserCreateModel, UserLoginModel, UserModel
+    PasswordHashingStatsModel,
+    UserBooksModel,
+    UserCreateModel,
+    UserLoginModel,
+    UserModel,
+    UserPrincipalModel,
+    UserUpdateModel,
 )
+from src.auth.revocations import revocation_filter
 from src.auth.services import UserService
-from src.auth.utils import create_access_token, verify_passwd
+from src.auth.token_cache import token_cache
+from src.auth.utils import (
+    REFRESH_TOKEN_EXPIRY,
+    access_token_user_data,
+    create_access_token,
+    password_hasher,
+    refresh_token_user_data,
+)
+from src.books.recommendations import (
+    MAX_RECOMMENDATIONS, get_recommendations, retrain
+)
+from src.books.schemas import RecommendedBookModel, RecommenderRetrainModel
+from src.books.services import BookService
 from src.db.main import get_session
 from src.db.redis import add_jti_to_blocklist
 
 auth_router = APIRouter()
 user_service = UserService()
-role_checker = RoleChecker(['admin', 'user'])
-
-REFRESH_TOKEN_EXPIRY = 2
+book_service = BookService()
+admin_checker = Depends(RoleChecker(['admin'], from_claims=True))
 
 
 @auth_router.post(
@@ -51,17 +72,20 @@ async def login_users(
     password = login_data.password
     user = await user_service.get_user_by_email(email, session)
     if user is not None:
-        password_valid = verify_passwd(password, user.password_hash)
+        password_valid, new_hash = await password_hasher.verify(
+            password, user.password_hash
+        )
         if password_valid:
+            if new_hash is not None:
+                # Stored at an older BCRYPT_ROUNDS: upgrade it in place.
+                await user_service.update_password_hash(
+                    user.id, new_hash, session
+                )
             access_token = create_access_token(
-                user_data={
-                    "email": user.email,
-                    "user_id": str(user.id),
-                    "role": user.role
-                }
+                user_data=access_token_user_data(user)
             )
             refresh_token = create_access_token(
-                user_data={"email": user.email, "user_id": str(user.id)},
+                user_data=refresh_token_user_data(user),
                 expiry=timedelta(days=REFRESH_TOKEN_EXPIRY),
                 refresh=True,
             )
@@ -81,12 +105,26 @@ async def login_users(
 
 @auth_router.get("/refresh")
 async def refresh_token(
-    token_details: dict = Depends(RefreshTokenBearer())
+    token_details: dict = Depends(RefreshTokenBearer()),
+    session: AsyncSession = Depends(get_session),
 ) -> dict:
     exp_timestamp = token_details['exp']
-    if datetime.fromtimestamp(exp_timestamp) > datetime.now():
+    user = await user_service.load_principal(
+        token_details['user']['user_id'], session
+    )
+    # The row's generation is authoritative: the Redis copy checked by
+    # TokenBearer expires, and a "log out everywhere" must outlast it.
+    if user is not None and (
+        datetime.fromtimestamp(exp_timestamp) > datetime.now()
+    ) and (
+        token_details['user'].get('token_generation', 0)
+        >= user.token_generation
+    ):
+        # Role claims come from the user row itself, never from the
+        # refresh token or a cached principal, so a refresh always picks
+        # up role changes.
         new_access_token = create_access_token(
-            user_data=token_details['user']
+            user_data=access_token_user_data(user)
         )
         return JSONResponse(
             content={
@@ -101,18 +139,92 @@ async def refresh_token(
 
 @auth_router.get('/me', response_model=UserBooksModel)
 async def get_current_user(
-    user: dict = Depends(get_current_user)
+    user: UserPrincipalModel = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
 ):
+    # The only route that needs the full user with books and reviews.
+    return await user_service.get_user(user.id, session)
+
+
+@auth_router.patch(
+    '/users/{user_id}', response_model=UserModel, dependencies=[admin_checker]
+)
+async def update_user(
+    user_id: uuid.UUID,
+    user_data: UserUpdateModel,
+    session: AsyncSession = Depends(get_session),
+):
+    user = await user_service.update_user(user_id, user_data, session)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
+        )
     return user
 
 
+@auth_router.get(
+    '/me/recommendations', response_model=List[RecommendedBookModel]
+)
+async def get_my_recommendations(
+    limit: int = Query(default=10, ge=1, le=MAX_RECOMMENDATIONS),
+    token_details: dict = Depends(AccessTokenBearer()),
+    session: AsyncSession = Depends(get_session),
+):
+    user_id = uuid.UUID(token_details['user']['user_id'])
+    recommended = await get_recommendations(user_id, limit, session)
+    return await book_service.get_scored_books(
+        recommended, RecommendedBookModel, session
+    )
+
+
+@auth_router.post(
+    '/recommendations/retrain',
+    response_model=RecommenderRetrainModel,
+    dependencies=[admin_checker]
+)
+async def retrain_recommendations(
+    session: AsyncSession = Depends(get_session),
+):
+    return await retrain(session)
+
+
+@auth_router.get(
+    '/password-hashing/stats',
+    response_model=PasswordHashingStatsModel,
+    dependencies=[admin_checker]
+)
+async def password_hashing_stats():
+    return password_hasher.stats()
+
+
 @auth_router.get('/logout')
 async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
     jti = token_details['jti']
-    await add_jti_to_blocklist(jti=jti)
+    # Blocklisted only for as long as the token could still be used.
+    await add_jti_to_blocklist(
+        jti=jti, expiry=token_details['exp'] - time.time()
+    )
+    token_cache.invalidate_jti(jti)
+    # Other workers learn about it over pub/sub; this one needn't wait.
+    revocation_filter.add(jti)
     return JSONResponse(
         content={
             "message": "Logged out succesfully."
         },
         status_code=status.HTTP_200_OK
     )
+
+
+@auth_router.get('/logout/all')
+async def revoke_all_tokens(
+    token_details: dict = Depends(AccessTokenBearer()),
+    session: AsyncSession = Depends(get_session),
+):
+    user_id = uuid.UUID(token_details['user']['user_id'])
+    await user_service.revoke_all_tokens(user_id, session)
+    return JSONResponse(
+        content={
+            "message": "Logged out of all sessions."
+        },
+        status_code=status.HTTP_200_OK
+    )
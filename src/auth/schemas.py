@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -30,11 +30,41 @@ class UserModel(BaseModel):
     updated_at: datetime
 
 
+class UserPrincipalModel(BaseModel):
+    # What authorization needs about a user, cached between requests.
+    id: uuid.UUID
+    username: str
+    email: str
+    role: str
+    role_version: int = 0
+    token_generation: int = 0
+    is_verified: bool
+
+
+class UserUpdateModel(BaseModel):
+    first_name: Optional[str] = Field(default=None, max_length=12)
+    last_name: Optional[str] = Field(default=None, max_length=12)
+    username: Optional[str] = Field(default=None, max_length=8)
+    phone_number: Optional[str] = Field(default=None, max_length=12)
+    role: Optional[str] = None
+    is_verified: Optional[bool] = None
+
+
 class UserBooksModel(UserModel):
     books: List[Book]
     reviews: List[ReviewModel]
 
 
+class PasswordHashingStatsModel(BaseModel):
+    workers: int
+    rounds: int
+    running: int
+    waiting: int
+    max_waiting: int
+    completed: int
+    avg_ms: float
+
+
 class UserLoginModel(BaseModel):
     email: str = Field(max_length=50)
     password: str = Field(min_length=8, max_length=12)
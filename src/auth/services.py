@@ -1,9 +1,48 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 
-from src.auth.schemas import UserCreateModel
-from src.auth.utils import generate_passwd_hash
+from src.auth.revocations import revocation_filter
+from src.auth.schemas import (
+    UserCreateModel, UserPrincipalModel, UserUpdateModel
+)
+from src.auth.utils import REFRESH_TOKEN_EXPIRY, password_hasher
+from src.cache import TTLCache
+from src.config import Config
 from src.db.models import User
+from src.db.redis import (
+    delete_principal,
+    get_principal,
+    role_version_key,
+    set_principal,
+    set_role_version,
+    set_token_generation,
+    token_generation_key,
+)
+
+# Per-process tier in front of the shared Redis copy. Other workers can't
+# evict it, so its short TTL bounds how long a role change takes to apply
+# everywhere. When the user changes, the Redis copy is replaced by a
+# short tombstone that blocks refills from reads older than the change.
+principal_cache: TTLCache[UserPrincipalModel] = TTLCache(
+    Config.PRINCIPAL_CACHE_MAX_ENTRIES, Config.PRINCIPAL_CACHE_TTL_SECONDS
+)
+PRINCIPAL_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.role,
+    User.role_version,
+    User.token_generation,
+    User.is_verified,
+)
 
 
 class UserService:
@@ -13,9 +52,53 @@ class UserService:
         user = result.first()
         return user
 
+    async def get_user(self, user_id: uuid.UUID, session: AsyncSession):
+        return await session.get(User, user_id)
+
+    async def load_principal(
+        self, user_id: str, session: AsyncSession
+    ) -> Optional[UserPrincipalModel]:
+        # Primary key lookup of plain columns: none of the user's books or
+        # reviews are loaded. Always current, unlike get_principal.
+        result = await session.exec(
+            select(*PRINCIPAL_COLUMNS).where(User.id == uuid.UUID(user_id))
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return UserPrincipalModel.model_validate(row._asdict())
+
+    async def get_principal(
+        self, user_id: str, session: AsyncSession
+    ) -> Optional[UserPrincipalModel]:
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+        payload = await get_principal(user_id)
+        if payload is not None:
+            principal = UserPrincipalModel.model_validate_json(payload)
+        else:
+            principal = await self.load_principal(user_id, session)
+            if principal is None:
+                return None
+            filled = await set_principal(
+                user_id, principal.model_dump_json().encode()
+            )
+            if not filled:
+                # The user changed, or is changing, under us: serve this
+                # read but don't cache it.
+                return principal
+        principal_cache.put(user_id, principal)
+        return principal
+
+    async def invalidate_principal(self, user_id: str) -> None:
+        principal_cache.pop(user_id)
+        await delete_principal(user_id)
+
     async def user_exists(self, email: str, session: AsyncSession):
-        user = await self.get_user_by_email(email, session)
-        return True if user is not None else False
+        statement = select(User.id).where(User.email == email)
+        result = await session.exec(statement)
+        return result.first() is not None
 
     async def create_user(
         self, user_data: UserCreateModel, session: AsyncSession
@@ -23,10 +106,77 @@ class UserService:
         user_data_dict = user_data.model_dump()
         new_user = User(**user_data_dict)
         new_user.role = "user"
-        new_user.password_hash = generate_passwd_hash(
+        new_user.password_hash = await password_hasher.hash(
             user_data_dict["password"]
         )
         session.add(new_user)
-        await session.commit()
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent signup for the same email.
+            await session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User already exists with this email.",
+            )
 
         return new_user
+
+    async def update_password_hash(
+        self, user_id: uuid.UUID, password_hash: str, session: AsyncSession
+    ) -> None:
+        await session.exec(
+            update(User)
+            .where(User.id == user_id)
+            .values(password_hash=password_hash)
+        )
+        await session.commit()
+
+    async def revoke_all_tokens(
+        self, user_id: uuid.UUID, session: AsyncSession
+    ) -> None:
+        # One counter bump revokes every access and refresh token issued
+        # so far, however many sessions the user has.
+        result = await session.exec(
+            update(User)
+            .where(User.id == user_id)
+            .values(token_generation=User.token_generation + 1)
+            .returning(User.token_generation)
+        )
+        generation = result.scalar_one()
+        await session.commit()
+        await self.invalidate_principal(str(user_id))
+        await set_token_generation(
+            str(user_id),
+            generation,
+            int(timedelta(days=REFRESH_TOKEN_EXPIRY).total_seconds()),
+        )
+        revocation_filter.add(token_generation_key(str(user_id)))
+
+    async def update_user(
+        self,
+        user_id: uuid.UUID,
+        user_data: UserUpdateModel,
+        session: AsyncSession,
+    ) -> Optional[dict]:
+        values = user_data.model_dump(exclude_unset=True, exclude_none=True)
+        if "role" in values:
+            values["role_version"] = User.role_version + 1
+        statement = (
+            update(User)
+            .where(User.id == user_id)
+            .values(**values, updated_at=datetime.now())
+            .returning(*User.__table__.c)
+        )
+        result = await session.exec(statement)
+        user = result.first()
+        await session.commit()
+        if user is None:
+            return None
+        await self.invalidate_principal(str(user_id))
+        if "role" in values:
+            await set_role_version(
+                str(user_id), user.role_version, Config.ACCESS_TOKEN_EXPIRY
+            )
+            revocation_filter.add(role_version_key(str(user_id)))
+        return user._asdict()
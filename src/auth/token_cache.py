@@ -0,0 +1,49 @@
+import hashlib
+from typing import Dict, Optional
+
+from src.auth.utils import decode_token
+from src.cache import TTLCache
+from src.config import Config
+
+
+def token_digest(token: str) -> str:
+    # Raw tokens are bearer credentials; only their digest is kept around.
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+# LRU of verified token claims. Entries expire at the token's own exp, so
+# a cached token is never accepted past the point where PyJWT would
+# reject it. Only successfully verified tokens are cached.
+class VerifiedTokenCache(TTLCache[dict]):
+    def __init__(self, max_entries: int) -> None:
+        super().__init__(max_entries)
+        self._digests_by_jti: Dict[str, str] = {}
+
+    def put(self, digest: str, claims: dict) -> None:
+        if claims.get("exp") is None:
+            return
+        super().put(digest, claims, expires_at=float(claims["exp"]))
+        if claims.get("jti"):
+            self._digests_by_jti[claims["jti"]] = digest
+
+    def on_remove(self, digest: str, claims: dict) -> None:
+        jti = claims.get("jti")
+        if jti and self._digests_by_jti.get(jti) == digest:
+            del self._digests_by_jti[jti]
+
+    def invalidate_jti(self, jti: str) -> None:
+        digest = self._digests_by_jti.get(jti)
+        if digest is not None:
+            self.pop(digest)
+
+    def verify(self, token: str) -> Optional[dict]:
+        digest = token_digest(token)
+        claims = self.get(digest)
+        if claims is None:
+            claims = decode_token(token)
+            if claims is not None:
+                self.put(digest, claims)
+        return claims
+
+
+token_cache = VerifiedTokenCache(Config.TOKEN_CACHE_MAX_ENTRIES)
@@ -1,13 +1,21 @@
+import asyncio
 import logging
+import time
 import uuid
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
 
 import jwt
 from passlib.context import CryptContext
 
 from src.config import Config
 
-passwd_context = CryptContext(schemes=["bcrypt"])
+# Hashes at other costs still verify and are flagged for rehashing, so
+# BCRYPT_ROUNDS can be moved either way.
+passwd_context = CryptContext(
+    schemes=["bcrypt"], bcrypt__rounds=Config.BCRYPT_ROUNDS
+)
 
 
 def generate_passwd_hash(password: str) -> str:
@@ -15,8 +23,98 @@ def generate_passwd_hash(password: str) -> str:
     return passwd_hash
 
 
-def verify_passwd(password: str, password_hash: str) -> bool:
-    return passwd_context.verify(password, password_hash)
+# bcrypt releases the GIL, so a small thread pool keeps it off the event
+# loop. The semaphore caps concurrent hashes at the pool size; callers
+# beyond it wait their turn, and are counted while they do.
+class PasswordHasher:
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._slots = asyncio.Semaphore(workers)
+        self.waiting = 0
+        self.running = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self._busy_seconds = 0.0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+        return self._pool
+
+    async def _run(self, func, *args):
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), func, *args)
+        finally:
+            self._busy_seconds += time.perf_counter() - started
+            self.running -= 1
+            self.completed += 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(generate_passwd_hash, password)
+
+    async def verify(
+        self, password: str, password_hash: str
+    ) -> Tuple[bool, Optional[str]]:
+        # The second item is a fresh hash when the stored one was made
+        # at a different cost and should be replaced.
+        return await self._run(
+            passwd_context.verify_and_update, password, password_hash
+        )
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "workers": self.workers,
+            "rounds": Config.BCRYPT_ROUNDS,
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "completed": self.completed,
+            "avg_ms": (
+                self._busy_seconds / self.completed * 1000
+                if self.completed else 0.0
+            ),
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(Config.PASSWORD_HASH_WORKERS)
+
+
+# Days a refresh token stays valid.
+REFRESH_TOKEN_EXPIRY = 2
+
+
+def refresh_token_user_data(user) -> dict:
+    return {
+        "email": user.email,
+        "user_id": str(user.id),
+        "token_generation": user.token_generation,
+    }
+
+
+def access_token_user_data(user) -> dict:
+    # Claims RoleChecker(from_claims=True) authorizes from.
+    return {
+        **refresh_token_user_data(user),
+        "role": user.role,
+        "role_version": user.role_version,
+    }
 
 
 def create_access_token(
@@ -24,7 +122,9 @@ def create_access_token(
 ):
     payload = {}
     payload["user"] = user_data
-    payload["exp"] = datetime.now() + (
+    # Aware, so exp is the real expiry and the blocklist can size TTLs
+    # from it.
+    payload["exp"] = datetime.now(timezone.utc) + (
         expiry if expiry is not None else timedelta(
             seconds=Config.ACCESS_TOKEN_EXPIRY
         )
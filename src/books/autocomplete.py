@@ -0,0 +1,225 @@
+import asyncio
+import bisect
+import json
+import logging
+import sys
+import time
+import unicodedata
+import uuid
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.main import async_engine
+from src.db.models import Book, Tag
+from src.db.redis import (
+    AUTOCOMPLETE_CHANNEL, autocomplete_pubsub, publish_autocomplete_changes
+)
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[str, str, str]
+# (+1 or -1, kind, text)
+Change = Tuple[int, str, str]
+
+# Missed or doubled messages skew the reference counts; a periodic
+# reload from the database puts them right.
+RESYNC_SECONDS = 3600
+PUBLISH_SECONDS = 0.5
+RETRY_SECONDS = 5
+WORKER_ID = uuid.uuid4().hex
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+# Sorted array of (normalized, kind, text) entries. Lookups bisect to the
+# first entry >= prefix and walk forward while the prefix still matches.
+# Entries are reference counted since many books can share an author.
+class PrefixIndex:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.dropped = 0
+        self._entries: List[Entry] = []
+        self._counts: Counter = Counter()
+        self._entry_bytes = 0
+        self._changes: List[Change] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _entry(self, kind: str, text: str) -> Optional[Entry]:
+        key = normalize(text)
+        if not key:
+            return None
+        return (key, kind, text)
+
+    @staticmethod
+    def _sizeof(entry: Entry) -> int:
+        key, _, text = entry
+        return sys.getsizeof(entry) + sys.getsizeof(key) + sys.getsizeof(text)
+
+    def build(self, counts: Counter) -> None:
+        if len(counts) > self.max_entries:
+            self.dropped = len(counts) - self.max_entries
+            counts = Counter(dict(counts.most_common(self.max_entries)))
+        else:
+            self.dropped = 0
+        self._counts = counts
+        self._entries = sorted(counts)
+        self._entry_bytes = sum(self._sizeof(e) for e in self._entries)
+
+    # add and remove record the change for the other workers; changes
+    # received from them go through apply_changes, which doesn't.
+    def add(self, kind: str, text: str) -> None:
+        self._add(kind, text)
+        self._changes.append((1, kind, text))
+
+    def remove(self, kind: str, text: str) -> None:
+        self._remove(kind, text)
+        self._changes.append((-1, kind, text))
+
+    def take_changes(self) -> List[Change]:
+        changes, self._changes = self._changes, []
+        return changes
+
+    def apply_changes(self, changes: Iterable[Change]) -> None:
+        for delta, kind, text in changes:
+            if delta > 0:
+                self._add(kind, text)
+            else:
+                self._remove(kind, text)
+
+    def _add(self, kind: str, text: str) -> None:
+        entry = self._entry(kind, text)
+        if entry is None:
+            return
+        if entry not in self._counts:
+            if len(self._entries) >= self.max_entries:
+                self.dropped += 1
+                return
+            bisect.insort(self._entries, entry)
+            self._entry_bytes += self._sizeof(entry)
+        self._counts[entry] += 1
+
+    def _remove(self, kind: str, text: str) -> None:
+        entry = self._entry(kind, text)
+        count = self._counts.get(entry) if entry else None
+        if not count:
+            return
+        if count > 1:
+            self._counts[entry] = count - 1
+            return
+        del self._counts[entry]
+        i = bisect.bisect_left(self._entries, entry)
+        if i < len(self._entries) and self._entries[i] == entry:
+            del self._entries[i]
+            self._entry_bytes -= self._sizeof(entry)
+
+    def add_book(self, title: str, author: str) -> None:
+        self.add("title", title)
+        self.add("author", author)
+
+    def remove_book(self, title: str, author: str) -> None:
+        self.remove("title", title)
+        self.remove("author", author)
+
+    def search(self, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+        key = normalize(prefix)
+        i = bisect.bisect_left(self._entries, (key,))
+        suggestions = []
+        while i < len(self._entries) and len(suggestions) < limit:
+            normalized, kind, text = self._entries[i]
+            if not normalized.startswith(key):
+                break
+            suggestions.append({"text": text, "kind": kind})
+            i += 1
+        return suggestions
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "dropped": self.dropped,
+            "approx_bytes": (
+                self._entry_bytes
+                + sys.getsizeof(self._entries)
+                + sys.getsizeof(self._counts)
+            ),
+        }
+
+    async def load(self, session: AsyncSession) -> None:
+        counts: Counter = Counter()
+        books = await session.exec(select(Book.title, Book.author))
+        for title, author in books:
+            for entry in (
+                self._entry("title", title), self._entry("author", author)
+            ):
+                if entry is not None:
+                    counts[entry] += 1
+        tags = await session.exec(select(Tag.name))
+        for name in tags:
+            entry = self._entry("tag", name)
+            if entry is not None:
+                counts[entry] += 1
+        self.build(counts)
+
+
+book_index = PrefixIndex(Config.AUTOCOMPLETE_MAX_ENTRIES)
+
+
+async def reload_index() -> None:
+    async with AsyncSession(async_engine) as session:
+        await book_index.load(session)
+
+
+async def _publish_changes() -> None:
+    changes = book_index.take_changes()
+    if changes:
+        await publish_autocomplete_changes(
+            json.dumps({"origin": WORKER_ID, "changes": changes}).encode()
+        )
+
+
+async def _follow(pubsub, reload: bool) -> None:
+    # Each worker applies its own changes at once and publishes them in
+    # batches; it skips them when they come back on the channel.
+    await pubsub.subscribe(AUTOCOMPLETE_CHANNEL)
+    if reload:
+        await reload_index()
+    synced_at = time.monotonic()
+    while True:
+        message = await pubsub.get_message(
+            ignore_subscribe_messages=True, timeout=PUBLISH_SECONDS
+        )
+        if message is not None:
+            payload = json.loads(message["data"])
+            if payload["origin"] != WORKER_ID:
+                book_index.apply_changes(payload["changes"])
+        await _publish_changes()
+        if time.monotonic() - synced_at > RESYNC_SECONDS:
+            await reload_index()
+            synced_at = time.monotonic()
+
+
+async def sync_autocomplete() -> None:
+    # The index is loaded at startup, so only reconnects reload first.
+    reload = False
+    while True:
+        pubsub = autocomplete_pubsub()
+        try:
+            await _follow(pubsub, reload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Autocomplete sync failed")
+        finally:
+            await pubsub.close()
+        reload = True
+        await asyncio.sleep(RETRY_SECONDS)
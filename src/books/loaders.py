@@ -0,0 +1,61 @@
+import asyncio
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.books.schemas import BookProjectionModel
+from src.books.services import BookService
+from src.db.main import get_session
+
+book_service = BookService()
+
+
+# Request-scoped batching loader: every load() issued before the event
+# loop gets back to the dispatch task is resolved by a single
+# ``WHERE id = ANY(...)`` query. Results are cached for the request.
+class BookLoader:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self._futures: Dict[uuid.UUID, asyncio.Future] = {}
+        self._pending: List[uuid.UUID] = []
+        self._dispatch_task: Optional[asyncio.Task] = None
+
+    def load(self, book_id: uuid.UUID) -> asyncio.Future:
+        future = self._futures.get(book_id)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[book_id] = future
+        self._pending.append(book_id)
+        if self._dispatch_task is None:
+            self._dispatch_task = loop.create_task(self._dispatch())
+        return future
+
+    async def load_many(
+        self, book_ids: Iterable[uuid.UUID]
+    ) -> List[Optional[BookProjectionModel]]:
+        return list(
+            await asyncio.gather(*(self.load(book_id) for book_id in book_ids))
+        )
+
+    async def _dispatch(self) -> None:
+        book_ids, self._pending = self._pending, []
+        self._dispatch_task = None
+        try:
+            books = await book_service.get_books_by_ids(book_ids, self.session)
+        except Exception as e:
+            for book_id in book_ids:
+                self._futures.pop(book_id).set_exception(e)
+            return
+        found = {book.id: book for book in books}
+        for book_id in book_ids:
+            self._futures[book_id].set_result(found.get(book_id))
+
+
+def get_book_loader(
+    session: AsyncSession = Depends(get_session)
+) -> BookLoader:
+    return BookLoader(session)
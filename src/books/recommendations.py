@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.main import async_engine
+from src.db.models import Review
+from src.db.redis import acquire_recommender_lock
+
+logger = logging.getLogger(__name__)
+
+# PureSVD: a truncated SVD of the user x book rating matrix. Only the item
+# factors Q are kept; a user is scored as r_u Q Q^T, folding in their
+# current reviews at request time, so new reviews count before the next
+# retrain and users unseen by the model still get recommendations.
+MODEL_DIR = Path(Config.RECOMMENDER_MODEL_DIR)
+CURRENT_FILE = "CURRENT"
+RELOAD_CHECK_SECONDS = 30
+POPULAR_BOOKS = 1000
+MAX_RECOMMENDATIONS = 100
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def rating_weight(rating):
+    # Shifted so that even the lowest rating counts as an interaction.
+    return rating + 1
+
+
+def _save_arrays(arrays: Dict[str, np.ndarray]) -> str:
+    # Each model lives in its own directory; CURRENT is swapped with an
+    # atomic rename so readers never see a half-written model.
+    version = str(time.time_ns())
+    target = MODEL_DIR / version
+    target.mkdir(parents=True)
+    for name, array in arrays.items():
+        np.save(target / f"{name}.npy", array)
+    pointer = MODEL_DIR / f"{CURRENT_FILE}.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, MODEL_DIR / CURRENT_FILE)
+    for stale in MODEL_DIR.iterdir():
+        if stale.is_dir() and stale.name != version:
+            shutil.rmtree(stale, ignore_errors=True)
+    return version
+
+
+def train_model(
+    user_ids: Sequence[str],
+    book_ids: Sequence[str],
+    ratings: Sequence[int],
+    factors: int,
+) -> Dict[str, int]:
+    # Runs in a worker process: everything here is CPU-bound.
+    users, user_rows = np.unique(np.asarray(user_ids), return_inverse=True)
+    books, book_cols = np.unique(np.asarray(book_ids), return_inverse=True)
+    shape = (len(users), len(books))
+    # Repeated reviews of a book by one user are averaged.
+    weights = rating_weight(np.asarray(ratings, dtype=np.float32))
+    totals = sparse.csr_matrix((weights, (user_rows, book_cols)), shape=shape)
+    counts = sparse.csr_matrix(
+        (np.ones_like(weights), (user_rows, book_cols)), shape=shape
+    )
+    totals.sum_duplicates()
+    counts.sum_duplicates()
+    matrix = totals.copy()
+    matrix.data /= counts.data
+    rank = min(factors, min(shape) - 1)
+    if rank < 1:
+        return {"users": len(users), "books": len(books), "factors": 0}
+    _, _, vt = svds(matrix, k=rank)
+    popularity = np.asarray(counts.sum(axis=0)).ravel()
+    _save_arrays({
+        "item_factors": np.ascontiguousarray(vt.T, dtype=np.float32),
+        "book_ids": books.astype("S36"),
+        "popular": np.argsort(-popularity)[:POPULAR_BOOKS].astype(np.int32),
+    })
+    return {"users": len(users), "books": len(books), "factors": rank}
+
+
+class Recommender:
+    def __init__(self) -> None:
+        self.version: Optional[str] = None
+        self.item_factors: Optional[np.ndarray] = None
+        self.popular: Optional[np.ndarray] = None
+        self.book_ids: List[uuid.UUID] = []
+        self.book_rows: Dict[uuid.UUID, int] = {}
+        self._checked_at = 0.0
+
+    def _current_version(self) -> Optional[str]:
+        try:
+            return (MODEL_DIR / CURRENT_FILE).read_text().strip()
+        except FileNotFoundError:
+            return None
+
+    def reload(self, force: bool = False) -> None:
+        # Cheap enough to call per request: the pointer file is only read
+        # every RELOAD_CHECK_SECONDS and arrays are memory-mapped.
+        now = time.monotonic()
+        if not force and now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        version = self._current_version()
+        if version is None or version == self.version:
+            return
+        path = MODEL_DIR / version
+        try:
+            item_factors = np.load(path / "item_factors.npy", mmap_mode="r")
+            popular = np.load(path / "popular.npy", mmap_mode="r")
+            book_ids = [
+                uuid.UUID(book_id.decode())
+                for book_id in np.load(path / "book_ids.npy")
+            ]
+        except FileNotFoundError:
+            return
+        self.item_factors, self.popular = item_factors, popular
+        self.book_ids = book_ids
+        self.book_rows = {book_id: row for row, book_id in enumerate(book_ids)}
+        self.version = version
+
+    def recommend(
+        self, rated: Dict[uuid.UUID, float], limit: int
+    ) -> List[Tuple[uuid.UUID, float]]:
+        self.reload()
+        if self.item_factors is None:
+            return []
+        rows = [self.book_rows[b] for b in rated if b in self.book_rows]
+        exclude = np.array(rows, dtype=np.int64)
+        if rows:
+            weights = np.array(
+                [rated[self.book_ids[row]] for row in rows], dtype=np.float32
+            )
+            profile = weights @ self.item_factors[exclude]
+            scores = np.asarray(self.item_factors @ profile)
+        else:
+            # Nothing to fold in: fall back to the most reviewed books.
+            scores = np.zeros(len(self.book_ids), dtype=np.float32)
+            scores[self.popular] = np.linspace(
+                1, 0, len(self.popular), endpoint=False
+            )
+        scores[exclude] = -np.inf
+        count = min(limit, len(scores) - len(rows))
+        if count <= 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (self.book_ids[row], float(scores[row]))
+            for row in top
+            if np.isfinite(scores[row])
+        ]
+
+
+recommender = Recommender()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def retrain(session: AsyncSession) -> Dict[str, int]:
+    result = await session.exec(
+        select(Review.user_id, Review.book_id, Review.rating)
+        .where(Review.user_id.is_not(None))
+        .where(Review.book_id.is_not(None))
+    )
+    rows = result.all()
+    loop = asyncio.get_running_loop()
+    stats = await loop.run_in_executor(
+        _get_pool(),
+        train_model,
+        [str(user_id) for user_id, _, _ in rows],
+        [str(book_id) for _, book_id, _ in rows],
+        [rating for _, _, rating in rows],
+        Config.RECOMMENDER_FACTORS,
+    )
+    recommender.reload(force=True)
+    return {**stats, "ratings": len(rows)}
+
+
+async def retrain_periodically() -> None:
+    # Every worker runs this loop; the Redis lock lets one of them train
+    # per period and the others pick the new model up from disk.
+    period = int(Config.RECOMMENDER_RETRAIN_HOURS * 3600)
+    while True:
+        try:
+            if await acquire_recommender_lock(period):
+                async with AsyncSession(async_engine) as session:
+                    await retrain(session)
+        except Exception:
+            logger.exception("Recommender retrain failed")
+        await asyncio.sleep(min(period, 600))
+
+
+async def get_recommendations(
+    user_id: uuid.UUID, limit: int, session: AsyncSession
+) -> List[Tuple[uuid.UUID, float]]:
+    # One indexed query on reviews(user_id, ...) gives both the profile to
+    # fold in and the books to exclude.
+    result = await session.exec(
+        select(Review.book_id, Review.rating)
+        .where(Review.user_id == user_id)
+        .where(Review.book_id.is_not(None))
+    )
+    rated = {
+        book_id: float(rating_weight(rating))
+        for book_id, rating in result.all()
+    }
+    return recommender.recommend(rated, limit)
@@ -1,32 +1,251 @@
-from typing import List
+import uuid
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, status
+from fastapi import (
+    APIRouter, Depends, Header, Query, Request, Response, status
+)
 from fastapi.exceptions import HTTPException
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.auth.dependencies import AccessTokenBearer, RoleChecker
+from src.books.autocomplete import book_index
 from src.books.schemas import (
-    Book, BookCreateModel, BookUpdateModel, BookDetailsModel
+    AutocompleteStatsModel,
+    AutocompleteSuggestionModel,
+    Book,
+    BookBrowseModel,
+    BookBulkDeleteModel,
+    BookBulkDeleteResultModel,
+    BookBatchGetModel,
+    BookBatchModel,
+    BookCreateModel,
+    BookDetailsModel,
+    BookImportResultModel,
+    BookPageModel,
+    BookRatingsModel,
+    BookUpdateModel,
+    MAX_BATCH_GET_IDS,
+    SimilarBookModel,
+    SimilarRebuildModel,
+    TrendingBookModel,
+    TrendingRebuildModel,
 )
+from src.books.loaders import BookLoader, get_book_loader
 from src.books.services import BookService
+from src.books.streaming import (
+    export_response, iter_csv_records, iter_lines, iter_ndjson_records
+)
+from src.books.similarity import (
+    SIMILAR_TOP_K, get_similar, rebuild_similar_books
+)
+from src.books.trending import (
+    MAX_TRENDING_LIMIT, get_trending_books, rebuild_trending
+)
 from src.db.main import get_session
+from src.db.models import Book as BookTable
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.etags import etag_matches, etag_response, not_modified
 
 book_router = APIRouter()
 book_service = BookService()
 access_token_bearer = AccessTokenBearer()
-role_checker = Depends(RoleChecker(['admin', 'user']))
+role_checker = Depends(
+    RoleChecker(['admin', 'user'], from_claims=True)
+)
+admin_checker = Depends(RoleChecker(['admin'], from_claims=True))
+
+
+BOOK_SORTS = "^(created_at|rating|review_count)$"
+
+
+def parse_fields(fields: Optional[str] = None) -> Optional[List[str]]:
+    if fields is None:
+        return None
+    return [name.strip() for name in fields.split(",") if name.strip()]
+
+
+@book_router.get(
+    "/search", response_model=BookPageModel, response_model_exclude_unset=True
+)
+async def search_books(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(parse_fields),
+    session: AsyncSession = Depends(get_session),
+    user_details=Depends(access_token_bearer),
+) -> dict:
+    books, next_cursor = await book_service.search_books(
+        q, session, limit=limit, cursor=cursor, fields=fields
+    )
+    return {"items": books, "next_cursor": next_cursor}
+
+
+@book_router.get(
+    "/autocomplete", response_model=List[AutocompleteSuggestionModel]
+)
+async def autocomplete_books(
+    prefix: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=50),
+    user_details=Depends(access_token_bearer),
+):
+    return book_index.search(prefix, limit=limit)
+
+
+@book_router.get(
+    "/autocomplete/stats",
+    response_model=AutocompleteStatsModel,
+    dependencies=[role_checker]
+)
+async def autocomplete_stats(user_details=Depends(access_token_bearer)):
+    return book_index.stats()
+
+
+@book_router.get("/trending", response_model=List[TrendingBookModel])
+async def trending_books(
+    limit: int = Query(default=10, ge=1, le=MAX_TRENDING_LIMIT),
+    session: AsyncSession = Depends(get_session),
+    user_details=Depends(access_token_bearer),
+):
+    trending = await get_trending_books(limit)
+    return await book_service.get_scored_books(
+        trending, TrendingBookModel, session
+    )
+
+
+@book_router.post(
+    "/trending/rebuild",
+    response_model=TrendingRebuildModel,
+    dependencies=[admin_checker]
+)
+async def rebuild_trending_books(
+    session: AsyncSession = Depends(get_session),
+):
+    return {"books": await rebuild_trending(session)}
+
+
+@book_router.get(
+    "/browse",
+    response_model=BookBrowseModel,
+    response_model_exclude_unset=True
+)
+async def browse_books(
+    language: List[str] = Query(default=[]),
+    publisher: List[str] = Query(default=[]),
+    tag: List[str] = Query(default=[]),
+    year_from: Optional[int] = Query(default=None, ge=1, le=9998),
+    year_to: Optional[int] = Query(default=None, ge=1, le=9998),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(parse_fields),
+    sort: str = Query(default="created_at", pattern=BOOK_SORTS),
+    session: AsyncSession = Depends(get_session),
+    user_details=Depends(access_token_bearer),
+):
+    return await book_service.browse_books(
+        session,
+        languages=language,
+        publishers=publisher,
+        tags=tag,
+        year_from=year_from,
+        year_to=year_to,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+        sort=sort,
+    )
+
+
+@book_router.post(
+    "/similar/rebuild",
+    response_model=SimilarRebuildModel,
+    dependencies=[admin_checker]
+)
+async def rebuild_similar(session: AsyncSession = Depends(get_session)):
+    return {"books": await rebuild_similar_books(session)}
+
+
+async def resolve_batch(ids: List[str], book_loader: BookLoader) -> dict:
+    requested = {}
+    for raw_id in dict.fromkeys(ids):
+        try:
+            requested[raw_id] = uuid.UUID(raw_id)
+        except ValueError:
+            requested[raw_id] = None
+    books = await book_loader.load_many(
+        book_id for book_id in requested.values() if book_id is not None
+    )
+    found = {book.id: book for book in books if book is not None}
+    return {
+        "items": [
+            found[book_id] for book_id in requested.values()
+            if book_id in found
+        ],
+        "missing": [
+            raw_id for raw_id, book_id in requested.items()
+            if book_id not in found
+        ],
+    }
+
+
+def parse_batch_ids(ids: str) -> List[str]:
+    book_ids = [book_id.strip() for book_id in ids.split(",")]
+    book_ids = [book_id for book_id in book_ids if book_id]
+    if not book_ids or len(book_ids) > MAX_BATCH_GET_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Provide between 1 and {MAX_BATCH_GET_IDS} book ids."
+        )
+    return book_ids
+
+
+# Kept as an alias of GET /books?ids=... for existing callers.
+@book_router.get("/batch-get", response_model=BookBatchModel)
+async def batch_get_books(
+    ids: str = Query(min_length=1),
+    book_loader: BookLoader = Depends(get_book_loader),
+    user_details=Depends(access_token_bearer),
+):
+    return await resolve_batch(parse_batch_ids(ids), book_loader)
+
+
+@book_router.post("/batch-get", response_model=BookBatchModel)
+async def post_batch_get_books(
+    batch: BookBatchGetModel,
+    book_loader: BookLoader = Depends(get_book_loader),
+    user_details=Depends(access_token_bearer),
+):
+    return await resolve_batch(batch.ids, book_loader)
+
+
+@book_router.get("/export", dependencies=[admin_checker])
+async def export_books(
+    export_format: str = Query(
+        default="ndjson", alias="format", pattern="^(ndjson|csv)$"
+    ),
+):
+    return export_response(
+        select(BookTable.__table__), export_format, "books"
+    )
 
 
 @book_router.get("/{book_id}", response_model=BookDetailsModel)
 async def get_book(
     book_id: str,
+    if_none_match: Optional[str] = Header(default=None),
     session: AsyncSession = Depends(get_session),
     user_details=Depends(access_token_bearer),
 ) -> dict:
     # print(user_details)
-    book = await book_service.get_book(book_id, session)
-    if book:
-        return book
+    if if_none_match:
+        etag = await book_service.get_book_details_etag(book_id)
+        if etag is not None and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    details = await book_service.get_book_details(book_id, session)
+    if details is not None:
+        etag, payload = details
+        return etag_response(payload, if_none_match, etag=etag)
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -34,14 +253,61 @@ async def get_book(
         )
 
 
-@book_router.get("/", response_model=List[Book])
+@book_router.get("/{book_id}/similar", response_model=List[SimilarBookModel])
+async def similar_books(
+    book_id: uuid.UUID,
+    limit: int = Query(default=10, ge=1, le=SIMILAR_TOP_K),
+    session: AsyncSession = Depends(get_session),
+    user_details=Depends(access_token_bearer),
+):
+    similar = await get_similar(book_id, limit)
+    return await book_service.get_scored_books(
+        similar, SimilarBookModel, session
+    )
+
+
+@book_router.get("/{book_id}/ratings", response_model=BookRatingsModel)
+async def get_book_ratings(
+    book_id: str,
+    session: AsyncSession = Depends(get_session),
+    user_details=Depends(access_token_bearer),
+):
+    ratings = await book_service.get_book_ratings(book_id, session)
+    if ratings is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Book not found for the provided id",
+        )
+    return ratings
+
+
+@book_router.get(
+    "/",
+    response_model=Union[BookBatchModel, BookPageModel],
+    response_model_exclude_unset=True,
+)
 async def get_books(
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(parse_fields),
+    sort: str = Query(default="created_at", pattern=BOOK_SORTS),
+    ids: Optional[str] = Query(default=None, min_length=1),
     session: AsyncSession = Depends(get_session),
+    book_loader: BookLoader = Depends(get_book_loader),
     user_details=Depends(access_token_bearer),
-) -> dict:
-    books = await book_service.get_books(session)
+):
+    if ids is not None:
+        # ?ids=a,b,c turns the listing into a multi-get: input order kept,
+        # unknown ids reported under "missing".
+        return BookBatchModel.model_validate(
+            await resolve_batch(parse_batch_ids(ids), book_loader),
+            from_attributes=True,
+        )
+    books, next_cursor = await book_service.get_books(
+        session, limit=limit, cursor=cursor, fields=fields, sort=sort
+    )
     if books:
-        return books
+        return {"items": books, "next_cursor": next_cursor}
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="No book found"
@@ -50,17 +316,25 @@ async def get_books(
 
 @book_router.get(
     "/user/{user_id}",
-    response_model=List[Book],
+    response_model=BookPageModel,
+    response_model_exclude_unset=True,
     dependencies=[role_checker]
 )
 async def get_user_book_submission(
     user_id: str,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(parse_fields),
+    sort: str = Query(default="created_at", pattern=BOOK_SORTS),
     session: AsyncSession = Depends(get_session),
     user_details=Depends(access_token_bearer),
 ) -> dict:
-    books = await book_service.get_user_books(user_id, session)
+    books, next_cursor = await book_service.get_user_books(
+        user_id, session, limit=limit, cursor=cursor, fields=fields,
+        sort=sort
+    )
     if books:
-        return books
+        return {"items": books, "next_cursor": next_cursor}
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="No book found"
@@ -83,26 +357,76 @@ async def create_book(
     return new_book
 
 
+@book_router.post(
+    "/import",
+    response_model=BookImportResultModel,
+    dependencies=[role_checker]
+)
+async def import_books(
+    request: Request,
+    import_format: Optional[str] = Query(
+        default=None, alias="format", pattern="^(ndjson|csv)$"
+    ),
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    if import_format is None:
+        content_type = request.headers.get("content-type", "")
+        import_format = "csv" if "csv" in content_type else "ndjson"
+    lines = iter_lines(request.stream())
+    if import_format == "csv":
+        records = iter_csv_records(lines)
+    else:
+        records = iter_ndjson_records(lines)
+    user_id = token_details.get('user')['user_id']
+    return await book_service.import_books(records, user_id, session)
+
+
 @book_router.patch(
     "/{book_id}",
-    response_model=Book,
-    dependencies=[role_checker]
+    response_model=BookDetailsModel,
+    dependencies=[role_checker],
+    responses={status.HTTP_204_NO_CONTENT: {}},
 )
 async def update_book(
     book_id: str,
     book_update_data: BookUpdateModel,
+    if_match: Optional[str] = Header(default=None),
+    prefer: Optional[str] = Header(default=None),
     session: AsyncSession = Depends(get_session),
     token_details: dict = Depends(access_token_bearer),
-) -> dict:
-    updated_book = await book_service.update_book(
-        book_id, book_update_data, session
+):
+    return_minimal = prefer is not None and "return=minimal" in prefer
+    updated = await book_service.update_book(
+        book_id,
+        book_update_data,
+        session,
+        if_match=if_match,
+        return_body=not return_minimal,
     )
-    if updated_book:
-        return updated_book
-    else:
+    if updated is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
         )
+    etag, payload = updated
+    if return_minimal:
+        return Response(
+            status_code=status.HTTP_204_NO_CONTENT,
+            headers={"Preference-Applied": "return=minimal", "ETag": etag},
+        )
+    return etag_response(payload, None, etag=etag)
+
+
+@book_router.post(
+    "/bulk-delete",
+    response_model=BookBulkDeleteResultModel,
+    dependencies=[admin_checker]
+)
+async def bulk_delete_books(
+    bulk_delete: BookBulkDeleteModel,
+    session: AsyncSession = Depends(get_session),
+):
+    return await book_service.bulk_delete_books(bulk_delete, session)
 
 
 @book_router.delete(
@@ -115,10 +439,8 @@ async def delete_book(
     session: AsyncSession = Depends(get_session),
     user_details=Depends(access_token_bearer),
 ):
-    book_to_delete = await book_service.delete_book(book_id, session)
-    if book_to_delete is None:
+    deleted = await book_service.delete_book(book_id, session)
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
         )
-    else:
-        return {}
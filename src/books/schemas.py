@@ -1,8 +1,8 @@
 import uuid
 from datetime import date, datetime
-from typing import List
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 from src.reviews.schemas import ReviewModel
 from src.tags.schemas import TagModel
@@ -18,6 +18,9 @@ class Book(BaseModel):
     language: str
     created_at: datetime
     updated_at: datetime
+    review_count: int = 0
+    average_rating: Optional[float] = None
+    version: int = 1
 
 
 class BookDetailsModel(Book):
@@ -25,18 +28,193 @@ class BookDetailsModel(Book):
     tags: List[TagModel]
 
 
+class BookProjectionModel(BaseModel):
+    # Every field is optional so list endpoints can return sparse
+    # fieldsets; routes serialize it with ``response_model_exclude_unset``.
+    id: Optional[uuid.UUID] = None
+    title: Optional[str] = None
+    author: Optional[str] = None
+    publisher: Optional[str] = None
+    published_date: Optional[date] = None
+    page_count: Optional[int] = None
+    language: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    review_count: Optional[int] = None
+    average_rating: Optional[float] = None
+    version: Optional[int] = None
+
+
+class BookPageModel(BaseModel):
+    items: List[BookProjectionModel]
+    next_cursor: Optional[str] = None
+
+
+class FacetValueModel(BaseModel):
+    value: str
+    count: int
+
+
+class BookBrowseModel(BookPageModel):
+    facets: Dict[str, List[FacetValueModel]]
+
+
+MAX_BATCH_GET_IDS = 200
+
+
+class BookBatchGetModel(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=MAX_BATCH_GET_IDS)
+
+
+class BookBatchModel(BaseModel):
+    items: List[BookProjectionModel]
+    missing: List[str]
+
+
+class BookRatingsModel(BaseModel):
+    book_id: uuid.UUID
+    review_count: int
+    average_rating: Optional[float]
+    histogram: Dict[int, int]
+
+
+class TrendingBookModel(BaseModel):
+    id: uuid.UUID
+    title: str
+    author: str
+    review_count: int
+    average_rating: Optional[float] = None
+    score: float
+
+
+class SimilarBookModel(BaseModel):
+    id: uuid.UUID
+    title: str
+    author: str
+    score: float
+
+
+class RecommendedBookModel(BaseModel):
+    id: uuid.UUID
+    title: str
+    author: str
+    average_rating: Optional[float] = None
+    score: float
+
+
+class RecommenderRetrainModel(BaseModel):
+    users: int
+    books: int
+    ratings: int
+    factors: int
+
+
+class TrendingRebuildModel(BaseModel):
+    books: int
+
+
+class SimilarRebuildModel(BaseModel):
+    books: int
+
+
+MAX_BULK_DELETE_IDS = 1000
+
+
+class BookDeleteFilterModel(BaseModel):
+    language: List[str] = []
+    publisher: List[str] = []
+    tag: List[str] = []
+    year_from: Optional[int] = Field(default=None, ge=1, le=9998)
+    year_to: Optional[int] = Field(default=None, ge=1, le=9998)
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        # An empty filter would match the whole catalog.
+        if not self.model_dump(exclude_defaults=True):
+            raise ValueError("Provide at least one filter.")
+        return self
+
+
+class BookBulkDeleteModel(BaseModel):
+    ids: Optional[List[uuid.UUID]] = Field(
+        default=None, min_length=1, max_length=MAX_BULK_DELETE_IDS
+    )
+    filter: Optional[BookDeleteFilterModel] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide either ids or filter.")
+        return self
+
+
+class BookBulkDeleteResultModel(BaseModel):
+    books: int
+    reviews: int
+    tag_links: int
+
+
+# books.page_count is a Postgres INTEGER.
+MAX_PAGE_COUNT = 2**31 - 1
+TEXT_FIELDS = ("title", "author", "publisher", "language")
+
+
+def reject_nul(value: Optional[str]) -> Optional[str]:
+    # Postgres text can't hold NUL; catch it here rather than as a
+    # database error.
+    if value is not None and "\x00" in value:
+        raise ValueError("must not contain NUL characters")
+    return value
+
+
 class BookCreateModel(BaseModel):
     title: str
     author: str
     publisher: str
     published_date: str
-    page_count: int
+    page_count: int = Field(ge=0, le=MAX_PAGE_COUNT)
     language: str
 
+    _check_text = field_validator(*TEXT_FIELDS)(reject_nul)
+
 
 class BookUpdateModel(BaseModel):
-    title: str
-    author: str
-    publisher: str
-    page_count: int
-    language: str
+    # PATCH semantics: only the fields that were sent are written.
+    title: Optional[str] = None
+    author: Optional[str] = None
+    publisher: Optional[str] = None
+    page_count: Optional[int] = Field(default=None, ge=0, le=MAX_PAGE_COUNT)
+    language: Optional[str] = None
+
+    _check_text = field_validator(*TEXT_FIELDS)(reject_nul)
+
+
+class AutocompleteSuggestionModel(BaseModel):
+    text: str
+    kind: str
+
+
+class AutocompleteStatsModel(BaseModel):
+    entries: int
+    max_entries: int
+    dropped: int
+    approx_bytes: int
+
+
+class BookImportErrorModel(BaseModel):
+    line: int
+    error: str
+
+
+class BookImportResultModel(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: List[BookImportErrorModel] = []
+    max_errors: int = Field(default=1000, exclude=True)
+
+    def add_error(self, line: int, error: str) -> None:
+        # Only the first ``max_errors`` rows are itemized so a bad upload
+        # cannot grow the report without bound.
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(BookImportErrorModel(line=line, error=error))
@@ -1,27 +1,428 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
+from fastapi import status
+from fastapi.exceptions import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import (
+    Float,
+    Integer,
+    String,
+    and_,
+    any_,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import (
+    ARRAY, REGCONFIG, TSVECTOR, UUID, aggregate_order_by
+)
+from sqlalchemy.exc import DBAPIError
 from sqlmodel import desc, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.books.schemas import BookCreateModel, BookUpdateModel
-from src.db.models import Book
+from src.books.autocomplete import book_index
+from src.books.schemas import (
+    BookBrowseModel,
+    BookBulkDeleteModel,
+    BookBulkDeleteResultModel,
+    BookCreateModel,
+    BookDetailsModel,
+    BookImportResultModel,
+    BookProjectionModel,
+    BookRatingsModel,
+    BookUpdateModel,
+)
+from src.books.streaming import Record
+from src.db.models import (
+    BOOK_RATING_RANK,
+    BOOK_SEARCH_CONFIG,
+    Book,
+    BookRatingCount,
+    BookTag,
+    Review,
+    Tag,
+)
+from src.db.pagination import DEFAULT_PAGE_SIZE, decode_cursor, split_page
+from src.db.redis import (
+    delete_book_details,
+    get_book_details,
+    get_book_details_etag,
+    set_book_details,
+)
+from src.etags import if_match_versions, make_etag, version_etag
+
+BOOK_FIELDS = tuple(BookProjectionModel.model_fields)
+KEYSET_FIELDS = ("created_at", "id")
+COMPUTED_FIELDS = {
+    "average_rating": cast(Book.rating_sum, Float).op(
+        "/", return_type=Float
+    )(func.nullif(Book.review_count, 0)),
+}
+SORT_KEYS = {
+    "created_at": (Book.created_at, datetime.fromisoformat),
+    "rating": (BOOK_RATING_RANK, float),
+    "review_count": (Book.review_count, int),
+}
+FACET_LIMIT = 50
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_ERRORS = 1000
+
+search_vector = literal_column("books.search_vector", type_=TSVECTOR)
 
 
 class BookService:
-    async def get_books(self, session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.created_at))
+    def resolve_fields(self, fields: Optional[List[str]]) -> List[str]:
+        if not fields:
+            return list(BOOK_FIELDS)
+        unknown = sorted(set(fields) - set(BOOK_FIELDS))
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown book fields: {', '.join(unknown)}"
+            )
+        return list(dict.fromkeys(fields))
+
+    def select_fields(self, fields: List[str]):
+        # Plain column selects: no relationship loaders and no ORM
+        # identity map, rows come back as tuples.
+        columns = list(dict.fromkeys([*fields, *KEYSET_FIELDS]))
+        return select(*(
+            COMPUTED_FIELDS[name].label(name)
+            if name in COMPUTED_FIELDS else getattr(Book, name)
+            for name in columns
+        ))
+
+    def to_projection(self, row, fields: List[str]) -> BookProjectionModel:
+        return BookProjectionModel.model_construct(
+            **{name: getattr(row, name) for name in fields}
+        )
+
+    def _page_statement(
+        self, statement, limit: int, cursor: Optional[str], sort: str
+    ):
+        sort_key, parse_sort_value = SORT_KEYS[sort]
+        sort_column = sort_key.label("sort_key")
+        statement = statement.add_columns(sort_column)
+        if cursor is not None:
+            sort_value, book_id = decode_cursor(
+                cursor, parse_sort_value, uuid.UUID
+            )
+            statement = statement.where(
+                tuple_(sort_key, Book.id) < (sort_value, book_id)
+            )
+        return statement.order_by(
+            desc(sort_column), desc(Book.id)
+        ).limit(limit + 1)
+
+    async def _get_book_page(
+        self,
+        statement,
+        fields: List[str],
+        limit: int,
+        cursor: Optional[str],
+        session: AsyncSession,
+        sort: str = "created_at",
+    ):
+        statement = self._page_statement(statement, limit, cursor, sort)
+        result = await session.exec(statement)
+        rows, next_cursor = split_page(
+            result.all(), limit, lambda row: (row.sort_key, row.id)
+        )
+        return [self.to_projection(row, fields) for row in rows], next_cursor
+
+    async def get_books(
+        self,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        sort: str = "created_at",
+    ):
+        fields = self.resolve_fields(fields)
+        return await self._get_book_page(
+            self.select_fields(fields), fields, limit, cursor, session, sort
+        )
+
+    async def get_user_books(
+        self,
+        user_id: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        sort: str = "created_at",
+    ):
+        fields = self.resolve_fields(fields)
+        statement = self.select_fields(fields).where(Book.user_id == user_id)
+        return await self._get_book_page(
+            statement, fields, limit, cursor, session, sort
+        )
+
+    def _browse_filter_groups(
+        self,
+        languages: List[str],
+        publishers: List[str],
+        tags: List[str],
+        year_from: Optional[int],
+        year_to: Optional[int],
+    ) -> Dict[str, list]:
+        # Keyed by facet; a book must pass every group.
+        groups = {}
+        if languages:
+            groups["language"] = [Book.language.in_(languages)]
+        if publishers:
+            groups["publisher"] = [Book.publisher.in_(publishers)]
+        if tags:
+            groups["tag"] = [
+                Book.id.in_(
+                    select(BookTag.book_id)
+                    .join(Tag, Tag.id == BookTag.tag_id)
+                    .where(Tag.name.in_(tags))
+                )
+            ]
+        # Range on the column itself so ix_books_published_date applies.
+        years = []
+        if year_from is not None:
+            years.append(Book.published_date >= date(year_from, 1, 1))
+        if year_to is not None:
+            years.append(Book.published_date < date(year_to + 1, 1, 1))
+        if years:
+            groups["year"] = years
+        return groups
+
+    def _browse_filters(
+        self,
+        languages: List[str],
+        publishers: List[str],
+        tags: List[str],
+        year_from: Optional[int],
+        year_to: Optional[int],
+    ) -> list:
+        groups = self._browse_filter_groups(
+            languages, publishers, tags, year_from, year_to
+        )
+        return [condition for group in groups.values() for condition in group]
+
+    def _facet_counts(self, groups: Dict[str, list]):
+        # Disjunctive facets: each facet is counted over the books passing
+        # every other facet's filters, so selecting a value doesn't hide
+        # its siblings. The candidates are the books failing at most one
+        # group, with a flag per group saying whether they pass it.
+        year = cast(func.extract("year", Book.published_date), Integer)
+        conditions = {name: and_(*group) for name, group in groups.items()}
+        matched = select(
+            Book.id,
+            Book.language,
+            Book.publisher,
+            year.label("year"),
+            *(
+                condition.label(f"in_{name}")
+                for name, condition in conditions.items()
+            ),
+        )
+        if conditions:
+            misses = sum(
+                case((condition, 0), else_=1)
+                for condition in conditions.values()
+            )
+            matched = matched.where(misses <= 1)
+        matched = matched.cte("matched")
+
+        def other_groups(facet: str) -> list:
+            return [
+                matched.c[f"in_{name}"] for name in groups if name != facet
+            ]
+
+        columns = (
+            ("language", matched.c.language),
+            ("publisher", matched.c.publisher),
+            ("year", cast(matched.c.year, String)),
+        )
+        column_counts = [
+            select(
+                literal(name).label("facet"),
+                column.label("value"),
+                func.count().label("count"),
+            )
+            .where(*other_groups(name))
+            .group_by(column)
+            for name, column in columns
+        ]
+        tag_counts = (
+            select(
+                literal("tag").label("facet"),
+                Tag.name.label("value"),
+                func.count().label("count"),
+            )
+            .select_from(matched)
+            .join(BookTag, BookTag.book_id == matched.c.id)
+            .join(Tag, Tag.id == BookTag.tag_id)
+            .where(*other_groups("tag"))
+            .group_by(Tag.name)
+        )
+        counts = union_all(*column_counts, tag_counts).subquery("counts")
+        ranked = select(
+            counts,
+            func.row_number().over(
+                partition_by=counts.c.facet,
+                order_by=(desc(counts.c.count), counts.c.value),
+            ).label("position"),
+        ).subquery("ranked")
+        return (
+            select(ranked.c.facet, ranked.c.value, ranked.c["count"])
+            .where(ranked.c.position <= FACET_LIMIT)
+            .cte("facets")
+        )
+
+    async def browse_books(
+        self,
+        session: AsyncSession,
+        languages: List[str],
+        publishers: List[str],
+        tags: List[str],
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        sort: str = "created_at",
+    ) -> BookBrowseModel:
+        # The page and every facet's counts come back as two JSON arrays
+        # in a single row, so the whole browse view is one round trip.
+        fields = self.resolve_fields(fields)
+        groups = self._browse_filter_groups(
+            languages, publishers, tags, year_from, year_to
+        )
+        filters = [
+            condition for group in groups.values() for condition in group
+        ]
+        page = self._page_statement(
+            self.select_fields(fields).where(*filters), limit, cursor, sort
+        ).cte("page")
+        facets = self._facet_counts(groups)
+        items = (
+            select(
+                func.json_agg(
+                    aggregate_order_by(
+                        page.table_valued(),
+                        desc(page.c.sort_key),
+                        desc(page.c.id),
+                    )
+                )
+            )
+            .select_from(page)
+            .scalar_subquery()
+        )
+        facet_counts = (
+            select(
+                func.json_agg(
+                    aggregate_order_by(
+                        facets.table_valued(),
+                        facets.c.facet,
+                        desc(facets.c["count"]),
+                        facets.c.value,
+                    )
+                )
+            )
+            .select_from(facets)
+            .scalar_subquery()
+        )
+        result = await session.exec(select(items, facet_counts))
+        rows, facet_rows = result.one()
+        rows, next_cursor = split_page(
+            rows or [], limit, lambda row: (row["sort_key"], row["id"])
+        )
+        grouped = {"language": [], "publisher": [], "tag": [], "year": []}
+        for facet in facet_rows or []:
+            grouped[facet["facet"]].append(
+                {"value": facet["value"], "count": facet["count"]}
+            )
+        return BookBrowseModel(
+            items=[
+                BookProjectionModel.model_validate(
+                    {name: row[name] for name in fields}
+                )
+                for row in rows
+            ],
+            next_cursor=next_cursor,
+            facets=grouped,
+        )
+
+    async def get_books_by_ids(
+        self,
+        book_ids: Iterable[uuid.UUID],
+        session: AsyncSession,
+        fields: Optional[List[str]] = None,
+    ) -> List[BookProjectionModel]:
+        fields = self.resolve_fields(fields)
+        # A single array parameter keeps one cached plan for any batch size.
+        statement = self.select_fields(fields).where(
+            Book.id == any_(literal(list(book_ids), ARRAY(UUID)))
+        )
         result = await session.exec(statement)
-        return result.all()
+        return [self.to_projection(row, fields) for row in result.all()]
+
+    async def get_scored_books(
+        self,
+        scored: List[Tuple[uuid.UUID, float]],
+        model,
+        session: AsyncSession,
+    ) -> list:
+        # Hydrates (book id, score) pairs from the ranking read models with
+        # one ANY(...) query, dropping books that have since been deleted.
+        books = await self.get_books_by_ids(
+            [book_id for book_id, _ in scored],
+            session,
+            fields=list(model.model_fields.keys() - {"score"}),
+        )
+        found = {book.id: book for book in books}
+        return [
+            model(**found[book_id].model_dump(), score=score)
+            for book_id, score in scored
+            if book_id in found
+        ]
 
-    async def get_user_books(self, user_id: str, session: AsyncSession):
+    async def search_books(
+        self,
+        query: str,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ):
+        fields = self.resolve_fields(fields)
+        ts_query = func.websearch_to_tsquery(
+            cast(BOOK_SEARCH_CONFIG, REGCONFIG), query
+        )
+        rank = func.ts_rank(search_vector, ts_query)
+        ranked = rank.label("rank")
         statement = (
-            select(Book)
-            .where(Book.user_id == user_id)
-            .order_by(desc(Book.created_at))
+            self.select_fields(fields)
+            .add_columns(ranked)
+            .where(search_vector.op("@@")(ts_query))
         )
+        if cursor is not None:
+            last_rank, book_id = decode_cursor(cursor, float, uuid.UUID)
+            statement = statement.where(
+                tuple_(rank, Book.id) < (last_rank, book_id)
+            )
+        statement = statement.order_by(
+            desc(ranked), desc(Book.id)
+        ).limit(limit + 1)
         result = await session.exec(statement)
-        return result.all()
+        rows, next_cursor = split_page(
+            result.all(), limit, lambda row: (row.rank, row.id)
+        )
+        return [self.to_projection(row, fields) for row in rows], next_cursor
 
     async def get_book(self, book_id: str, session: AsyncSession):
         book_id = uuid.UUID(book_id)
@@ -29,6 +430,100 @@ class BookService:
         result = await session.exec(statement)
         return result.first()
 
+    async def get_book_ratings(
+        self, book_id: str, session: AsyncSession
+    ) -> Optional[BookRatingsModel]:
+        try:
+            book_id = uuid.UUID(book_id)
+        except ValueError:
+            return None
+        result = await session.exec(
+            select(Book.review_count, COMPUTED_FIELDS["average_rating"])
+            .where(Book.id == book_id)
+        )
+        book = result.first()
+        if book is None:
+            return None
+        review_count, average_rating = book
+        result = await session.exec(
+            select(BookRatingCount.rating, BookRatingCount.count)
+            .where(BookRatingCount.book_id == book_id)
+            .where(BookRatingCount.count > 0)
+            .order_by(BookRatingCount.rating)
+        )
+        return BookRatingsModel(
+            book_id=book_id,
+            review_count=review_count,
+            average_rating=average_rating,
+            histogram=dict(result.all()),
+        )
+
+    def render_book_details(self, book: Book) -> Tuple[str, bytes]:
+        details = BookDetailsModel.model_validate(book, from_attributes=True)
+        body = details.model_dump_json().encode()
+        return make_etag(body, version=book.version), body
+
+    async def get_book_details_etag(self, book_id: str) -> Optional[str]:
+        try:
+            book_id = str(uuid.UUID(book_id))
+        except ValueError:
+            return None
+        return await get_book_details_etag(book_id)
+
+    async def get_book_details(
+        self, book_id: str, session: AsyncSession
+    ) -> Optional[Tuple[str, bytes]]:
+        try:
+            book_id = str(uuid.UUID(book_id))
+        except ValueError:
+            return None
+        details = await get_book_details(book_id)
+        if details is not None:
+            return details
+        book = await self.get_book(book_id, session)
+        if book is None:
+            return None
+        details = self.render_book_details(book)
+        await set_book_details({book_id: details}, only_if_missing=True)
+        return details
+
+    async def bump_versions(
+        self, book_ids: Iterable[uuid.UUID], session: AsyncSession
+    ) -> None:
+        # For writes that change a book's details document without going
+        # through update_book (tags, reviews); runs in the caller's
+        # transaction. The version orders competing cache writes.
+        book_ids = set(book_ids)
+        if book_ids:
+            await session.exec(
+                update(Book)
+                .where(Book.id.in_(book_ids))
+                .values(version=Book.version + 1)
+            )
+
+    async def refresh_book_details(
+        self, book_ids: Iterable[uuid.UUID], session: AsyncSession
+    ) -> Dict[str, Tuple[str, bytes]]:
+        book_ids = set(book_ids)
+        if not book_ids:
+            return {}
+        statement = (
+            select(Book)
+            .where(Book.id.in_(book_ids))
+            .execution_options(populate_existing=True)
+        )
+        result = await session.exec(statement)
+        payloads = {
+            str(book.id): self.render_book_details(book)
+            for book in result.all()
+        }
+        await set_book_details(payloads)
+        await delete_book_details(
+            str(book_id) for book_id in book_ids
+            if str(book_id) not in payloads
+        )
+        return payloads
+
     async def create_book(
         self, book_data: BookCreateModel, user_id: str, session: AsyncSession
     ):
@@ -40,24 +535,223 @@ class BookService:
         new_book.user_id = user_id
         session.add(new_book)
         await session.commit()
+        book_index.add_book(new_book.title, new_book.author)
         return new_book
 
+    def _import_row(self, record: dict, user_id: str) -> dict:
+        book_data = BookCreateModel.model_validate(record)
+        now = datetime.now()
+        return {
+            **book_data.model_dump(),
+            "id": uuid.uuid4(),
+            "published_date": datetime.strptime(
+                book_data.published_date, "%Y-%m-%d"
+            ).date(),
+            "user_id": uuid.UUID(user_id),
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    async def _insert_import_batch(
+        self,
+        batch: List[Tuple[int, dict]],
+        report: BookImportResultModel,
+        session: AsyncSession,
+    ) -> None:
+        # A failed batch is split in half and retried, so one bad row costs
+        # a few extra statements and only the offending rows are reported.
+        try:
+            await session.exec(
+                insert(Book).values([row for _, row in batch])
+            )
+            await session.commit()
+        except DBAPIError as e:
+            await session.rollback()
+            if len(batch) == 1 or e.connection_invalidated:
+                # A lost connection isn't the rows' fault: don't retry.
+                for line_no, _ in batch:
+                    report.add_error(line_no, f"Insert failed: {e.orig}")
+                return
+            middle = len(batch) // 2
+            await self._insert_import_batch(batch[:middle], report, session)
+            await self._insert_import_batch(batch[middle:], report, session)
+            return
+        report.inserted += len(batch)
+        for _, row in batch:
+            book_index.add_book(row["title"], row["author"])
+
+    async def import_books(
+        self,
+        records: AsyncIterator[Record],
+        user_id: str,
+        session: AsyncSession,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> BookImportResultModel:
+        # Rows are validated as they stream in and written in multi-row
+        # INSERTs; each batch commits on its own so memory stays flat.
+        report = BookImportResultModel(max_errors=MAX_IMPORT_ERRORS)
+        batch = []
+        async for line_no, record, error in records:
+            if error is None:
+                try:
+                    batch.append((line_no, self._import_row(record, user_id)))
+                except ValidationError as e:
+                    error = "; ".join(
+                        f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                        for err in e.errors()
+                    )
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                report.add_error(line_no, error)
+                continue
+            if len(batch) >= batch_size:
+                await self._insert_import_batch(batch, report, session)
+                batch = []
+        if batch:
+            await self._insert_import_batch(batch, report, session)
+        return report
+
     async def update_book(
-        self, book_id: str, book_data: BookUpdateModel, session: AsyncSession
-    ):
-        book_to_update = await self.get_book(book_id, session)
+        self,
+        book_id: str,
+        book_data: BookUpdateModel,
+        session: AsyncSession,
+        if_match: Optional[str] = None,
+        return_body: bool = True,
+    ) -> Optional[Tuple[str, bytes]]:
+        # One UPDATE ... RETURNING: only the sent fields are written and
+        # the version check happens in the WHERE clause. With a body, the
+        # details document GET serves is rendered and cached as well, so
+        # both return the same body and ETag; without one, the result is
+        # the new version's ETag and an empty body.
+        try:
+            book_id = uuid.UUID(book_id)
+        except ValueError:
+            return None
+        values = book_data.model_dump(exclude_unset=True, exclude_none=True)
+        if not values:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No fields to update."
+            )
+        statement = (
+            update(Book)
+            .where(Book.id == book_id)
+            .values(
+                **values,
+                version=Book.version + 1,
+                updated_at=datetime.now(),
+            )
+        )
+        versions = if_match_versions(if_match) if if_match else None
+        if versions is not None:
+            statement = statement.where(Book.version.in_(versions))
+        returning = [Book.id, Book.version, Book.title, Book.author]
+        renamed = bool({"title", "author"} & values.keys())
+        if renamed:
+            # The self-join sees the row as it was before this UPDATE.
+            old = Book.__table__.alias("old")
+            statement = statement.where(old.c.id == Book.id)
+            returning += [
+                old.c.title.label("old_title"),
+                old.c.author.label("old_author"),
+            ]
+        result = await session.exec(statement.returning(*returning))
+        row = result.first()
+        await session.commit()
+        if row is None:
+            if versions is not None:
+                await self._check_version_conflict(book_id, session)
+            return None
+        updated = dict(row._mapping)
+        old_title = updated.pop("old_title", None)
+        old_author = updated.pop("old_author", None)
+        if renamed:
+            book_index.remove_book(old_title, old_author)
+            book_index.add_book(updated["title"], updated["author"])
+        if not return_body:
+            await delete_book_details([str(book_id)])
+            return version_etag(updated["version"]), b""
+        payloads = await self.refresh_book_details([book_id], session)
+        return payloads.get(str(book_id))
 
-        if book_to_update is not None:
-            book_data_dict = book_data.model_dump()
+    async def _check_version_conflict(
+        self, book_id: uuid.UUID, session: AsyncSession
+    ) -> None:
+        result = await session.exec(
+            select(Book.version).where(Book.id == book_id)
+        )
+        if result.first() is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Book was modified by another request."
+            )
 
-            for k, v in book_data_dict.items():
-                setattr(book_to_update, k, v)
+    async def _delete_books(
+        self, filters: list, session: AsyncSession
+    ) -> BookBulkDeleteResultModel:
+        # Reviews, tag links and rating counts go with the book through
+        # ON DELETE CASCADE. The counting subqueries read the statement's
+        # snapshot, so they still see the rows the cascade removes.
+        deleted = (
+            delete(Book)
+            .where(*filters)
+            .returning(Book.id, Book.title, Book.author)
+            .cte("deleted")
+        )
+        review_count = (
+            select(func.count())
+            .where(Review.book_id == deleted.c.id)
+            .scalar_subquery()
+        )
+        tag_link_count = (
+            select(func.count())
+            .where(BookTag.book_id == deleted.c.id)
+            .scalar_subquery()
+        )
+        result = await session.exec(
+            select(
+                deleted.c.id,
+                deleted.c.title,
+                deleted.c.author,
+                review_count.label("reviews"),
+                tag_link_count.label("tag_links"),
+            )
+        )
+        rows = result.all()
+        await session.commit()
+        for row in rows:
+            book_index.remove_book(row.title, row.author)
+        await delete_book_details(str(row.id) for row in rows)
+        return BookBulkDeleteResultModel(
+            books=len(rows),
+            reviews=sum(row.reviews for row in rows),
+            tag_links=sum(row.tag_links for row in rows),
+        )
 
-            await session.commit()
-            return book_to_update
+    async def bulk_delete_books(
+        self, bulk_delete: BookBulkDeleteModel, session: AsyncSession
+    ) -> BookBulkDeleteResultModel:
+        if bulk_delete.ids is not None:
+            filters = [
+                Book.id == any_(literal(bulk_delete.ids, ARRAY(UUID)))
+            ]
+        else:
+            book_filter = bulk_delete.filter
+            filters = self._browse_filters(
+                book_filter.language,
+                book_filter.publisher,
+                book_filter.tag,
+                book_filter.year_from,
+                book_filter.year_to,
+            )
+        return await self._delete_books(filters, session)
 
-    async def delete_book(self, book_id: str, session: AsyncSession):
-        book_to_delete = await self.get_book(book_id, session)
-        if book_to_delete is not None:
-            await session.delete(book_to_delete)
-            await session.commit()
+    async def delete_book(self, book_id: str, session: AsyncSession) -> bool:
+        try:
+            book_id = uuid.UUID(book_id)
+        except ValueError:
+            return False
+        result = await self._delete_books([Book.id == book_id], session)
+        return result.books > 0
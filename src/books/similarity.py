@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import uuid
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.main import async_engine
+from src.db.models import BookTag
+from src.db.redis import (
+    acquire_similar_rebuild_lock,
+    delete_similar_books_except,
+    get_similar_book_ids,
+    get_similar_books,
+    merge_similar_books,
+    set_similar_books,
+    similar_books_built,
+)
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_TOP_K = Config.SIMILAR_BOOKS_TOP_K
+SIMILARITY_BATCH_SIZE = 1024
+
+Pair = Tuple[uuid.UUID, uuid.UUID]
+Neighbors = Dict[uuid.UUID, List[Tuple[uuid.UUID, float]]]
+
+
+def _index(values: Iterable) -> Dict:
+    index: Dict = {}
+    for value in values:
+        index.setdefault(value, len(index))
+    return index
+
+
+def idf_weights(document_counts: np.ndarray, total_books: int) -> np.ndarray:
+    # Smoothed IDF: a tag on every book still weighs 1, rare tags more.
+    return np.log((1 + total_books) / (1 + document_counts)) + 1
+
+
+def tag_matrix(
+    pairs: Sequence[Pair],
+    book_ids: Dict[uuid.UUID, int],
+    tag_ids: Dict[uuid.UUID, int],
+    idf: np.ndarray,
+) -> sparse.csr_matrix:
+    # Book x tag TF-IDF matrix with L2-normalized rows, so a row product
+    # is the cosine similarity of two books.
+    rows = np.fromiter(
+        (book_ids[book_id] for book_id, _ in pairs), np.int64, len(pairs)
+    )
+    cols = np.fromiter(
+        (tag_ids[tag_id] for _, tag_id in pairs), np.int64, len(pairs)
+    )
+    matrix = sparse.csr_matrix(
+        (idf[cols], (rows, cols)), shape=(len(book_ids), len(tag_ids))
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)))
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(matrix.multiply(1 / norms))
+
+
+def top_neighbors(
+    similarities: sparse.csr_matrix,
+    row_books: Sequence[uuid.UUID],
+    column_books: Sequence[uuid.UUID],
+    k: int,
+) -> Neighbors:
+    neighbors = {}
+    for row, book_id in enumerate(row_books):
+        start, end = similarities.indptr[row], similarities.indptr[row + 1]
+        columns = similarities.indices[start:end]
+        scores = similarities.data[start:end]
+        keep = scores > 0
+        columns, scores = columns[keep], scores[keep]
+        if len(scores) > k + 1:
+            best = np.argpartition(-scores, k + 1)[:k + 1]
+            columns, scores = columns[best], scores[best]
+        ranked = [
+            (column_books[column], float(score))
+            for column, score in sorted(
+                zip(columns, scores), key=lambda item: -item[1]
+            )
+            if column_books[column] != book_id
+        ]
+        neighbors[book_id] = ranked[:k]
+    return neighbors
+
+
+def compute_all_neighbors(pairs: Sequence[Pair], k: int) -> Neighbors:
+    # Cosine top-k for every book, one sparse product per batch of rows so
+    # the dense similarity matrix is never materialized.
+    book_ids = _index(book_id for book_id, _ in pairs)
+    tag_ids = _index(tag_id for _, tag_id in pairs)
+    document_counts = np.bincount(
+        [tag_ids[tag_id] for _, tag_id in pairs], minlength=len(tag_ids)
+    )
+    matrix = tag_matrix(
+        pairs, book_ids, tag_ids, idf_weights(document_counts, len(book_ids))
+    )
+    transposed = matrix.T.tocsr()
+    books = list(book_ids)
+    neighbors: Neighbors = {}
+    for start in range(0, len(books), SIMILARITY_BATCH_SIZE):
+        batch = matrix[start:start + SIMILARITY_BATCH_SIZE]
+        neighbors.update(
+            top_neighbors(
+                (batch @ transposed).tocsr(),
+                books[start:start + SIMILARITY_BATCH_SIZE],
+                books,
+                k,
+            )
+        )
+    return neighbors
+
+
+def _serialize(neighbors: Neighbors) -> Dict[str, List[Tuple[str, float]]]:
+    return {
+        str(book_id): [(str(other), score) for other, score in scores]
+        for book_id, scores in neighbors.items()
+    }
+
+
+async def rebuild_similar_books(session: AsyncSession) -> int:
+    result = await session.exec(select(BookTag.book_id, BookTag.tag_id))
+    pairs = result.all()
+    neighbors = await asyncio.to_thread(
+        compute_all_neighbors, pairs, SIMILAR_TOP_K
+    )
+    await set_similar_books(_serialize(neighbors))
+    await delete_similar_books_except(str(book_id) for book_id in neighbors)
+    return len(neighbors)
+
+
+async def warm_similar_books(session: AsyncSession) -> None:
+    if not await similar_books_built():
+        await rebuild_similar_books(session)
+
+
+def refresh_neighbors(
+    pairs: Sequence[Pair],
+    document_counts: Dict[uuid.UUID, int],
+    total_books: int,
+    changed: Sequence[uuid.UUID],
+    k: int,
+) -> Tuple[Neighbors, Dict[str, Dict[str, float]]]:
+    # The changed books' own lists, plus their score against every
+    # candidate so the candidates' lists can be patched.
+    book_ids = _index(book_id for book_id, _ in pairs)
+    tag_ids = _index(tag_id for _, tag_id in pairs)
+    idf = idf_weights(
+        np.array([document_counts[tag_id] for tag_id in tag_ids]),
+        total_books,
+    )
+    matrix = tag_matrix(pairs, book_ids, tag_ids, idf)
+    books = list(book_ids)
+    tagged = [book_id for book_id in changed if book_id in book_ids]
+    similarities = (
+        matrix[[book_ids[book_id] for book_id in tagged]] @ matrix.T
+    ).tocsr()
+    neighbors = top_neighbors(similarities, tagged, books, k)
+    neighbors.update({
+        book_id: [] for book_id in changed if book_id not in book_ids
+    })
+    scores: Dict[str, Dict[str, float]] = {}
+    for row, book_id in enumerate(tagged):
+        start, end = similarities.indptr[row], similarities.indptr[row + 1]
+        for column, score in zip(
+            similarities.indices[start:end], similarities.data[start:end]
+        ):
+            other = books[column]
+            if other != book_id and score > 0:
+                scores.setdefault(str(other), {})[str(book_id)] = float(score)
+    return neighbors, scores
+
+
+async def refresh_similar_books(
+    book_ids: Iterable[uuid.UUID], session: AsyncSession
+) -> None:
+    # Recomputes the changed books' lists against every book sharing a tag
+    # with them and patches those books' lists with the new scores. Tags
+    # on more than SIMILAR_REFRESH_MAX_TAG_BOOKS books don't pull in
+    # candidates (they still weigh in the vectors), and lists of untouched
+    # books are not re-ranked; the periodic rebuild catches both.
+    changed = list(dict.fromkeys(book_ids))
+    if not changed:
+        return
+    expand_tags = (
+        select(BookTag.tag_id)
+        .where(
+            BookTag.tag_id.in_(
+                select(BookTag.tag_id).where(BookTag.book_id.in_(changed))
+            )
+        )
+        .group_by(BookTag.tag_id)
+        .having(func.count() <= Config.SIMILAR_REFRESH_MAX_TAG_BOOKS)
+    )
+    candidates = select(BookTag.book_id).where(
+        BookTag.tag_id.in_(expand_tags)
+    )
+    result = await session.exec(
+        select(BookTag.book_id, BookTag.tag_id).where(
+            BookTag.book_id.in_(candidates) | BookTag.book_id.in_(changed)
+        )
+    )
+    pairs = result.all()
+    result = await session.exec(
+        select(BookTag.tag_id, func.count())
+        .where(BookTag.tag_id.in_({tag_id for _, tag_id in pairs}))
+        .group_by(BookTag.tag_id)
+    )
+    document_counts = dict(result.all())
+    result = await session.exec(
+        select(func.count(func.distinct(BookTag.book_id)))
+    )
+    total_books = result.one()
+
+    neighbors, scores = await asyncio.to_thread(
+        refresh_neighbors,
+        pairs,
+        document_counts,
+        total_books,
+        changed,
+        SIMILAR_TOP_K,
+    )
+    previous = await get_similar_book_ids(str(book_id) for book_id in changed)
+    removals: Dict[str, List[str]] = {}
+    for book_id in changed:
+        for other in previous.get(str(book_id), []):
+            if str(book_id) not in scores.get(other, {}):
+                removals.setdefault(other, []).append(str(book_id))
+    await set_similar_books(_serialize(neighbors))
+    await merge_similar_books(scores, removals, SIMILAR_TOP_K)
+
+
+async def rebuild_similar_periodically() -> None:
+    # Same scheme as the recommender: one worker rebuilds per period.
+    period = int(Config.SIMILAR_REBUILD_HOURS * 3600)
+    while True:
+        try:
+            if await acquire_similar_rebuild_lock(period):
+                async with AsyncSession(async_engine) as session:
+                    await rebuild_similar_books(session)
+        except Exception:
+            logger.exception("Similar books rebuild failed")
+        await asyncio.sleep(min(period, 600))
+
+
+async def get_similar(
+    book_id: uuid.UUID, limit: int
+) -> List[Tuple[uuid.UUID, float]]:
+    return [
+        (uuid.UUID(other), score)
+        for other, score in await get_similar_books(str(book_id), limit)
+    ]
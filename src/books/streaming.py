@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from src.db.main import async_engine
+
+MAX_LINE_BYTES = 64 * 1024
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# (line number, parsed record, error message)
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes]
+) -> AsyncIterator[Tuple[int, Optional[str], Optional[str]]]:
+    # Splits a streamed body into lines without holding more than one
+    # line in memory. Over-long or undecodable lines are reported as
+    # errors instead of aborting the stream.
+    buffer = b""
+    line_no = 0
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if skipping:
+                skipping = False
+                continue
+            yield _decode_line(line_no, line)
+        if len(buffer) > MAX_LINE_BYTES:
+            if not skipping:
+                yield line_no + 1, None, "Line is too long."
+                skipping = True
+            buffer = b""
+    if buffer and not skipping:
+        yield _decode_line(line_no + 1, buffer)
+
+
+def _decode_line(
+    line_no: int, line: bytes
+) -> Tuple[int, Optional[str], Optional[str]]:
+    if len(line) > MAX_LINE_BYTES:
+        return line_no, None, "Line is too long."
+    try:
+        text = line.decode("utf-8-sig" if line_no == 1 else "utf-8")
+    except UnicodeDecodeError:
+        return line_no, None, "Line is not valid UTF-8."
+    return line_no, text.rstrip("\r"), None
+
+
+async def iter_ndjson_records(lines) -> AsyncIterator[Record]:
+    async for line_no, line, error in lines:
+        if error is not None:
+            yield line_no, None, error
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Expected a JSON object."
+            continue
+        yield line_no, record, None
+
+
+async def iter_csv_records(lines) -> AsyncIterator[Record]:
+    # Records are one physical line each; quoted fields may not contain
+    # newlines.
+    header = None
+    async for line_no, line, error in lines:
+        if error is not None:
+            yield line_no, None, error
+            continue
+        if not line.strip():
+            continue
+        try:
+            values = next(csv.reader([line]))
+        except csv.Error as e:
+            yield line_no, None, f"Invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_no, None, (
+                f"Expected {len(header)} columns, got {len(values)}."
+            )
+            continue
+        yield line_no, dict(zip(header, values)), None
+
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+async def iter_export_chunks(
+    statement, export_format: str
+) -> AsyncIterator[bytes]:
+    # Runs on its own connection: the request's session dependency is
+    # closed before a StreamingResponse starts sending.
+    async with async_engine.connect() as conn:
+        result = await conn.stream(
+            statement.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        columns = list(result.keys())
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+        async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+            if export_format == "csv":
+                writer.writerows(
+                    [_export_value(value) for value in row] for row in rows
+                )
+                chunk = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                chunk = "".join(
+                    json.dumps(
+                        {
+                            column: _export_value(value)
+                            for column, value in zip(columns, row)
+                        }
+                    ) + "\n"
+                    for row in rows
+                )
+            yield chunk.encode()
+        if export_format == "csv" and buffer.getvalue():
+            yield buffer.getvalue().encode()
+
+
+def export_response(statement, export_format: str, name: str):
+    return StreamingResponse(
+        iter_export_chunks(statement, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{name}.{export_format}"'
+            )
+        },
+    )
@@ -0,0 +1,101 @@
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, literal
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.models import Review
+from src.db.redis import (
+    get_trending,
+    incr_trending,
+    replace_trending,
+    roll_over_trending,
+    trending_exists,
+)
+
+# Forward decay: a review at time t adds 2 ** ((t - landmark) / half_life)
+# to its book's score, so newer reviews weigh more and nothing has to be
+# rewritten as time passes. Dividing by the same factor for "now" gives
+# the decayed score. The landmark moves every EPOCH_HALF_LIVES half-lives
+# to keep the increments well inside float range; the old set is folded
+# into the new one once, scaled down by 2 ** -EPOCH_HALF_LIVES.
+HALF_LIFE = Config.TRENDING_HALF_LIFE_HOURS * 3600
+EPOCH_HALF_LIVES = 32
+EPOCH_SECONDS = HALF_LIFE * EPOCH_HALF_LIVES
+# Reviews older than this contribute less than 2 ** -20 of a fresh one.
+REBUILD_HALF_LIVES = 20
+TRENDING_EXPIRY = int(EPOCH_SECONDS * 2)
+MAX_TRENDING_LIMIT = 100
+
+
+def current_epoch(now: Optional[float] = None) -> Tuple[int, float]:
+    now = time.time() if now is None else now
+    epoch = int(now // EPOCH_SECONDS)
+    return epoch, epoch * EPOCH_SECONDS
+
+
+def decay_weight(timestamp: float, landmark: float) -> float:
+    return 2 ** ((timestamp - landmark) / HALF_LIFE)
+
+
+async def _ensure_epoch(epoch: int) -> None:
+    await roll_over_trending(
+        epoch, 2.0 ** -EPOCH_HALF_LIVES, TRENDING_EXPIRY
+    )
+
+
+async def record_review(book_id: uuid.UUID) -> None:
+    now = time.time()
+    epoch, landmark = current_epoch(now)
+    await _ensure_epoch(epoch)
+    await incr_trending(
+        epoch,
+        str(book_id),
+        decay_weight(now, landmark),
+        Config.TRENDING_MAX_BOOKS,
+        TRENDING_EXPIRY,
+    )
+
+
+async def get_trending_books(limit: int) -> List[Tuple[uuid.UUID, float]]:
+    now = time.time()
+    epoch, landmark = current_epoch(now)
+    await _ensure_epoch(epoch)
+    scale = decay_weight(now, landmark)
+    return [
+        (uuid.UUID(book_id), score / scale)
+        for book_id, score in await get_trending(epoch, limit)
+    ]
+
+
+async def rebuild_trending(session: AsyncSession) -> int:
+    # review.created_at is a naive local timestamp, so the landmark is
+    # compared as one too and only the interval reaches Postgres.
+    now = time.time()
+    epoch, landmark = current_epoch(now)
+    landmark_at = datetime.fromtimestamp(landmark)
+    since = datetime.fromtimestamp(now - HALF_LIFE * REBUILD_HALF_LIVES)
+    age = func.extract("epoch", Review.created_at - literal(landmark_at))
+    score = func.sum(func.power(2.0, age / HALF_LIFE)).label("score")
+    statement = (
+        select(Review.book_id, score)
+        .where(Review.created_at >= since)
+        .where(Review.book_id.is_not(None))
+        .group_by(Review.book_id)
+        .order_by(score.desc())
+        .limit(Config.TRENDING_MAX_BOOKS)
+    )
+    result = await session.exec(statement)
+    scores = {str(book_id): float(score) for book_id, score in result.all()}
+    await replace_trending(epoch, scores, TRENDING_EXPIRY)
+    return len(scores)
+
+
+async def warm_trending(session: AsyncSession) -> None:
+    epoch, _ = current_epoch()
+    if not await trending_exists(epoch):
+        await rebuild_trending(session)
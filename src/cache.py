@@ -0,0 +1,53 @@
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+# Bounded LRU whose entries also expire, either after a fixed ttl or at an
+# explicit timestamp. Meant for single event-loop use, so no locking.
+class TTLCache(Generic[V]):
+    def __init__(self, max_entries: int, ttl: Optional[float] = None) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            self.pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(
+        self, key: Hashable, value: V, expires_at: Optional[float] = None
+    ) -> None:
+        if expires_at is None:
+            if self.ttl is None:
+                return
+            expires_at = time.time() + self.ttl
+        if key in self._entries:
+            self.pop(key)
+        self._entries[key] = (expires_at, value)
+        while len(self._entries) > self.max_entries:
+            self.pop(next(iter(self._entries)))
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.on_remove(key, entry[1])
+        return entry[1]
+
+    def on_remove(self, key: Hashable, value: Any) -> None:
+        pass
@@ -9,6 +9,22 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRY: int
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
+    AUTOCOMPLETE_MAX_ENTRIES: int = 500_000
+    TOKEN_CACHE_MAX_ENTRIES: int = 10_000
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    REVOCATION_FILTER_CAPACITY: int = 100_000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    TRENDING_HALF_LIFE_HOURS: float = 24.0
+    TRENDING_MAX_BOOKS: int = 10_000
+    SIMILAR_BOOKS_TOP_K: int = 50
+    SIMILAR_REFRESH_MAX_TAG_BOOKS: int = 2_000
+    SIMILAR_REBUILD_HOURS: float = 6.0
+    RECOMMENDER_MODEL_DIR: str = "var/recommender"
+    RECOMMENDER_FACTORS: int = 64
+    RECOMMENDER_RETRAIN_HOURS: float = 24.0
 
     model_config = SettingsConfigDict(env_file="src/.env", extra="ignore")
 
@@ -3,13 +3,16 @@ from datetime import date, datetime
 from typing import List, Optional
 
 import sqlalchemy.dialects.postgresql as pg
-from sqlalchemy import Column
+from sqlalchemy import (
+    DDL, Column, Float, Index, cast, event, func, literal_column
+)
 from sqlmodel import Field, Relationship, SQLModel
 
 
 class User(SQLModel, table=True):
 
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_email", "email", unique=True),)
 
     id: uuid.UUID = Field(
         sa_column=Column(
@@ -27,6 +30,21 @@ class User(SQLModel, table=True):
         )
     )
     password_hash: str = Field(exclude=True)
+    # Bumped on every role change; access tokens carry the version they
+    # were issued at so stale role claims can be refused.
+    role_version: int = Field(
+        default=0,
+        sa_column=Column(
+            pg.INTEGER, nullable=False, default=0, server_default="0"
+        )
+    )
+    # Bumped to revoke every token issued to the user so far.
+    token_generation: int = Field(
+        default=0,
+        sa_column=Column(
+            pg.INTEGER, nullable=False, default=0, server_default="0"
+        )
+    )
     is_verified: bool = Field(
         sa_column=Column(pg.BOOLEAN, nullable=False, default=False)
     )
@@ -48,17 +66,29 @@ class User(SQLModel, table=True):
 
 
 class BookTag(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_booktag_tag_id_book_id", "tag_id", "book_id"),
+    )
+
     book_id: uuid.UUID = Field(
-        default=None, foreign_key="books.id", primary_key=True
+        default=None,
+        foreign_key="books.id",
+        ondelete="CASCADE",
+        primary_key=True,
     )
     tag_id: uuid.UUID = Field(
-        default=None, foreign_key="tags.id", primary_key=True
+        default=None,
+        foreign_key="tags.id",
+        ondelete="CASCADE",
+        primary_key=True,
     )
 
 
 class Tag(SQLModel, table=True):
 
     __tablename__ = "tags"
+    __table_args__ = (Index("ix_tags_name", "name", unique=True),)
+
     id: uuid.UUID = Field(
         sa_column=Column(
             pg.UUID, primary_key=True, nullable=False, default=uuid.uuid4
@@ -81,6 +111,17 @@ class Tag(SQLModel, table=True):
 class Book(SQLModel, table=True):
 
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_created_at_id", "created_at", "id"),
+        Index("ix_books_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index(
+            "ix_books_language_created_at_id", "language", "created_at", "id"
+        ),
+        Index(
+            "ix_books_publisher_created_at_id", "publisher", "created_at", "id"
+        ),
+        Index("ix_books_published_date", "published_date"),
+    )
 
     id: uuid.UUID = Field(
         sa_column=Column(
@@ -94,17 +135,36 @@ class Book(SQLModel, table=True):
     language: str
     published_date: date
     created_at: datetime = Field(
-        sa_column=Column(pg.TIMESTAMP, default=datetime.now())
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now)
     )
     updated_at: datetime = Field(
-        sa_column=Column(pg.TIMESTAMP, default=datetime.now())
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now)
     )
     user_id: Optional[uuid.UUID] = Field(
         default=None, foreign_key="users.id"
     )
+    review_count: int = Field(
+        default=0,
+        sa_column=Column(
+            pg.INTEGER, nullable=False, default=0, server_default="0"
+        )
+    )
+    rating_sum: int = Field(
+        default=0,
+        sa_column=Column(
+            pg.INTEGER, nullable=False, default=0, server_default="0"
+        )
+    )
+    version: int = Field(
+        default=1,
+        sa_column=Column(
+            pg.INTEGER, nullable=False, default=1, server_default="1"
+        )
+    )
     user: Optional[User] = Relationship(back_populates="books")
     reviews: List["Review"] = Relationship(
-        back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="book",
+        sa_relationship_kwargs={"lazy": "selectin", "passive_deletes": True},
     )
 
     tags: List[Tag] = Relationship(
@@ -113,13 +173,95 @@ class Book(SQLModel, table=True):
         sa_relationship_kwargs={"lazy": "selectin"},
     )
 
+    @property
+    def average_rating(self) -> Optional[float]:
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
+
     def __repr__(self):
         return f"<Book {self.title}>"
 
 
+# Sort key for "top rated"; books without reviews rank as 0. Queries must
+# use this exact expression to hit ix_books_rating_rank_id.
+BOOK_RATING_RANK = cast(Book.__table__.c.rating_sum, Float).op(
+    "/", return_type=Float
+)(
+    func.greatest(Book.__table__.c.review_count, literal_column("1"))
+)
+Index("ix_books_rating_rank_id", BOOK_RATING_RANK, Book.__table__.c.id)
+Index(
+    "ix_books_review_count_id",
+    Book.__table__.c.review_count,
+    Book.__table__.c.id,
+)
+
+
+class BookRatingCount(SQLModel, table=True):
+
+    __tablename__ = "book_rating_counts"
+
+    book_id: uuid.UUID = Field(
+        foreign_key="books.id", ondelete="CASCADE", primary_key=True
+    )
+    rating: int = Field(primary_key=True)
+    count: int = Field(default=0)
+
+
+# The full-text search vector is a generated column maintained by
+# Postgres; it is not mapped on the model so ORM loads never fetch it.
+BOOK_SEARCH_CONFIG = "english"
+BOOK_SEARCH_WEIGHTS = (("title", "A"), ("author", "B"), ("publisher", "C"))
+BOOK_SEARCH_VECTOR = " || ".join(
+    f"setweight(to_tsvector('{BOOK_SEARCH_CONFIG}', "
+    f"coalesce({column}, '')), '{weight}')"
+    for column, weight in BOOK_SEARCH_WEIGHTS
+)
+
+event.listen(
+    Book.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE books ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({BOOK_SEARCH_VECTOR}) STORED"
+    ),
+)
+event.listen(
+    Book.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX ix_books_search_vector ON books "
+        "USING gin (search_vector)"
+    ),
+)
+
+
 class Review(SQLModel, table=True):
 
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index(
+            "ix_reviews_book_id_created_at_id", "book_id", "created_at", "id"
+        ),
+        Index(
+            "ix_reviews_user_id_created_at_id", "user_id", "created_at", "id"
+        ),
+        Index(
+            "ix_reviews_book_id_rating_created_at_id",
+            "book_id",
+            "rating",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_reviews_user_id_rating_created_at_id",
+            "user_id",
+            "rating",
+            "created_at",
+            "id",
+        ),
+    )
 
     id: uuid.UUID = Field(
         sa_column=Column(
@@ -129,16 +271,16 @@ class Review(SQLModel, table=True):
     rating: int = Field(lt=5)
     review_text: str
     created_at: datetime = Field(
-        sa_column=Column(pg.TIMESTAMP, default=datetime.now())
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now)
     )
     updated_at: datetime = Field(
-        sa_column=Column(pg.TIMESTAMP, default=datetime.now())
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now)
     )
     user_id: Optional[uuid.UUID] = Field(
         default=None, foreign_key="users.id"
     )
     book_id: Optional[uuid.UUID] = Field(
-        default=None, foreign_key="books.id"
+        default=None, foreign_key="books.id", ondelete="CASCADE"
     )
     user: Optional[User] = Relationship(back_populates="reviews")
     book: Optional[Book] = Relationship(back_populates="reviews")
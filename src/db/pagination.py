@@ -0,0 +1,49 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import status
+from fastapi.exceptions import HTTPException
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def _cursor_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = json.dumps([_cursor_value(v) for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, *types: Callable[[Any], Any]) -> Tuple:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return tuple(
+            parse(value) for parse, value in zip(types, values, strict=True)
+        )
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor."
+        )
+
+
+def split_page(
+    rows: Sequence, limit: int, cursor_key: Callable[[Any], Tuple]
+) -> Tuple[List, Optional[str]]:
+    # Callers fetch ``limit + 1`` rows; the extra row only tells us
+    # whether another page exists.
+    items = list(rows[:limit])
+    if len(rows) > limit and items:
+        return items, encode_cursor(*cursor_key(items[-1]))
+    return items, None
@@ -1,8 +1,45 @@
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
 import aioredis
 
 from src.config import Config
 
 JTI_EXPIRY = 3600
+BOOK_DETAILS_EXPIRY = 86400
+BOOK_DETAILS_TOMBSTONE_EXPIRY = 10
+# Writes a details entry unless the key holds a tombstone or a document
+# of a higher version (read from the "v<version>." ETag prefix), or, for
+# fills after a miss (ARGV[4] == "1"), unless it holds anything at all.
+SET_BOOK_DETAILS_SCRIPT = """
+local function etag_version(etag)
+    return tonumber(string.match(etag, '^"v(%d+)%.')) or 0
+end
+if redis.call('hexists', KEYS[1], 'tombstone') == 1 then
+    return 0
+end
+local current = redis.call('hget', KEYS[1], 'etag')
+if current then
+    if ARGV[4] == '1' then
+        return 0
+    end
+    if etag_version(current) > etag_version(ARGV[1]) then
+        return 0
+    end
+end
+redis.call('hset', KEYS[1], 'etag', ARGV[1], 'body', ARGV[2])
+redis.call('expire', KEYS[1], ARGV[3])
+return 1
+"""
+TRENDING_KEY_PREFIX = "books:trending"
+SIMILAR_KEY_PREFIX = "book:similar"
+SIMILAR_BUILT_KEY = "books:similar:built"
+RECOMMENDER_LOCK_KEY = "books:recommender:lock"
+SIMILAR_REBUILD_LOCK_KEY = "books:similar:lock"
+REVOCATIONS_CHANNEL = "auth:revocations"
+AUTOCOMPLETE_CHANNEL = "autocomplete:changes"
+PRINCIPAL_EXPIRY = 3600
+PRINCIPAL_TOMBSTONE_EXPIRY = 10
 
 token_blocklist = aioredis.StrictRedis(
     host=Config.REDIS_HOST,
@@ -10,15 +47,309 @@ token_blocklist = aioredis.StrictRedis(
     db=0
 )
 
+read_models = aioredis.StrictRedis(
+    host=Config.REDIS_HOST,
+    port=Config.REDIS_PORT,
+    db=1
+)
+
+
+async def add_jti_to_blocklist(jti: str, expiry: int = JTI_EXPIRY) -> None:
+    async with token_blocklist.pipeline(transaction=False) as pipe:
+        pipe.set(name=jti, value='', ex=max(math.ceil(expiry), 1))
+        pipe.publish(REVOCATIONS_CHANNEL, jti)
+        await pipe.execute()
+
+
+def role_version_key(user_id: str) -> str:
+    return f"user:role_version:{user_id}"
+
+
+def token_generation_key(user_id: str) -> str:
+    return f"user:token_generation:{user_id}"
+
+
+async def _set_revocation_counter(key: str, value: int, expiry: int) -> None:
+    # Only needs to outlive the tokens issued before the change; tokens
+    # issued after it carry the new value.
+    async with token_blocklist.pipeline(transaction=False) as pipe:
+        pipe.set(key, value, ex=expiry)
+        pipe.publish(REVOCATIONS_CHANNEL, key)
+        await pipe.execute()
+
+
+async def set_role_version(user_id: str, version: int, expiry: int) -> None:
+    await _set_revocation_counter(role_version_key(user_id), version, expiry)
+
+
+async def set_token_generation(
+    user_id: str, generation: int, expiry: int
+) -> None:
+    await _set_revocation_counter(
+        token_generation_key(user_id), generation, expiry
+    )
+
+
+def revocations_pubsub():
+    return token_blocklist.pubsub()
+
 
-async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(
-        name=jti,
-        value='',
-        ex=JTI_EXPIRY
+async def publish_autocomplete_changes(message: bytes) -> None:
+    await read_models.publish(AUTOCOMPLETE_CHANNEL, message)
+
+
+def autocomplete_pubsub():
+    return read_models.pubsub()
+
+
+async def scan_revocations() -> List[str]:
+    # The blocklist database only holds revocation keys: JTIs, token
+    # generations and role versions.
+    return [
+        key.decode()
+        async for key in token_blocklist.scan_iter(count=1000)
+    ]
+
+
+async def token_revoked(
+    jti: str,
+    user_id: str,
+    generation: int,
+    role_version: Optional[int] = None,
+) -> bool:
+    # The blocklist, token generation and role version checks share one
+    # round trip. A token is revoked once a counter moves past its claim.
+    keys = [jti, token_generation_key(user_id)]
+    issued = [generation]
+    if role_version is not None:
+        keys.append(role_version_key(user_id))
+        issued.append(role_version)
+    blocked, *current = await token_blocklist.mget(*keys)
+    return blocked is not None or any(
+        value is not None and int(value) > claim
+        for value, claim in zip(current, issued)
+    )
+
+
+def book_details_key(book_id: str) -> str:
+    return f"book:details:{book_id}"
+
+
+async def get_book_details(book_id: str) -> Optional[Tuple[str, bytes]]:
+    etag, body = await read_models.hmget(
+        book_details_key(book_id), "etag", "body"
     )
+    if etag is None or body is None:
+        return None
+    return etag.decode(), body
+
+
+async def get_book_details_etag(book_id: str) -> Optional[str]:
+    etag = await read_models.hget(book_details_key(book_id), "etag")
+    return etag.decode() if etag is not None else None
+
+
+async def set_book_details(
+    payloads: Dict[str, Tuple[str, bytes]], only_if_missing: bool = False
+) -> None:
+    # Writers render after their own commit but can reach Redis out of
+    # order; the version check keeps the newest document, and a render
+    # that raced a delete can't outlive the delete's tombstone.
+    async with read_models.pipeline(transaction=False) as pipe:
+        for book_id, (etag, body) in payloads.items():
+            pipe.eval(
+                SET_BOOK_DETAILS_SCRIPT,
+                1,
+                book_details_key(book_id),
+                etag,
+                body,
+                BOOK_DETAILS_EXPIRY,
+                "1" if only_if_missing else "0",
+            )
+        await pipe.execute()
+
+
+async def delete_book_details(book_ids: Iterable[str]) -> None:
+    keys = [book_details_key(book_id) for book_id in book_ids]
+    if not keys:
+        return
+    async with read_models.pipeline(transaction=True) as pipe:
+        pipe.delete(*keys)
+        for key in keys:
+            pipe.hset(key, "tombstone", "")
+            pipe.expire(key, BOOK_DETAILS_TOMBSTONE_EXPIRY)
+        await pipe.execute()
+
+
+def trending_key(epoch: int) -> str:
+    return f"{TRENDING_KEY_PREFIX}:{epoch}"
+
 
+async def incr_trending(
+    epoch: int, book_id: str, amount: float, max_books: int, expiry: int
+) -> None:
+    key = trending_key(epoch)
+    async with read_models.pipeline(transaction=False) as pipe:
+        pipe.zincrby(key, amount, book_id)
+        # Keeps only the max_books highest scores; a no-op while the set
+        # is under the cap.
+        pipe.zremrangebyrank(key, 0, -(max_books + 1))
+        pipe.expire(key, expiry)
+        await pipe.execute()
 
-async def token_in_blocklist(jti: str) -> bool:
-    jti = await token_blocklist.get(jti)
-    return jti is not None
+
+async def get_trending(epoch: int, limit: int) -> List[Tuple[str, float]]:
+    entries = await read_models.zrevrange(
+        trending_key(epoch), 0, limit - 1, withscores=True
+    )
+    return [(book_id.decode(), score) for book_id, score in entries]
+
+
+async def trending_exists(epoch: int) -> bool:
+    return bool(await read_models.exists(trending_key(epoch)))
+
+
+async def roll_over_trending(
+    epoch: int, weight: float, expiry: int
+) -> None:
+    # Folds the previous epoch into the current one, rescaled to the new
+    # landmark. The NX marker makes this happen once per epoch; the union
+    # itself is atomic so concurrent ZINCRBYs are never lost.
+    marker = f"{trending_key(epoch)}:rolled"
+    if not await read_models.set(marker, "", nx=True, ex=expiry):
+        return
+    key, previous = trending_key(epoch), trending_key(epoch - 1)
+    async with read_models.pipeline(transaction=True) as pipe:
+        pipe.zunionstore(key, {key: 1, previous: weight})
+        pipe.delete(previous)
+        pipe.expire(key, expiry)
+        await pipe.execute()
+
+
+async def replace_trending(
+    epoch: int, scores: Dict[str, float], expiry: int
+) -> None:
+    key = trending_key(epoch)
+    staging = f"{key}:rebuild"
+    async with read_models.pipeline(transaction=True) as pipe:
+        pipe.delete(staging)
+        if scores:
+            pipe.zadd(staging, scores)
+            pipe.rename(staging, key)
+            pipe.expire(key, expiry)
+        else:
+            pipe.delete(key)
+        pipe.set(f"{key}:rolled", "", ex=expiry)
+        await pipe.execute()
+
+
+def similar_books_key(book_id: str) -> str:
+    return f"{SIMILAR_KEY_PREFIX}:{book_id}"
+
+
+async def get_similar_books(
+    book_id: str, limit: int
+) -> List[Tuple[str, float]]:
+    entries = await read_models.zrevrange(
+        similar_books_key(book_id), 0, limit - 1, withscores=True
+    )
+    return [(other_id.decode(), score) for other_id, score in entries]
+
+
+async def get_similar_book_ids(
+    book_ids: Iterable[str]
+) -> Dict[str, List[str]]:
+    book_ids = list(book_ids)
+    async with read_models.pipeline(transaction=False) as pipe:
+        for book_id in book_ids:
+            pipe.zrange(similar_books_key(book_id), 0, -1)
+        members = await pipe.execute()
+    return {
+        book_id: [other_id.decode() for other_id in others]
+        for book_id, others in zip(book_ids, members)
+    }
+
+
+async def set_similar_books(
+    neighbors: Dict[str, List[Tuple[str, float]]]
+) -> None:
+    async with read_models.pipeline(transaction=False) as pipe:
+        for book_id, scores in neighbors.items():
+            key = similar_books_key(book_id)
+            pipe.delete(key)
+            if scores:
+                pipe.zadd(key, dict(scores))
+        await pipe.execute()
+
+
+async def merge_similar_books(
+    scores: Dict[str, Dict[str, float]],
+    removals: Dict[str, List[str]],
+    max_entries: int,
+) -> None:
+    async with read_models.pipeline(transaction=False) as pipe:
+        for book_id, others in removals.items():
+            if others:
+                pipe.zrem(similar_books_key(book_id), *others)
+        for book_id, others in scores.items():
+            key = similar_books_key(book_id)
+            pipe.zadd(key, others)
+            pipe.zremrangebyrank(key, 0, -(max_entries + 1))
+        await pipe.execute()
+
+
+async def delete_similar_books_except(book_ids: Iterable[str]) -> None:
+    keep = {similar_books_key(book_id) for book_id in book_ids}
+    stale = [
+        key async for key in read_models.scan_iter(
+            match=similar_books_key("*"), count=1000
+        )
+        if key.decode() not in keep
+    ]
+    if stale:
+        await read_models.delete(*stale)
+    await read_models.set(SIMILAR_BUILT_KEY, "")
+
+
+async def similar_books_built() -> bool:
+    return bool(await read_models.exists(SIMILAR_BUILT_KEY))
+
+
+async def acquire_recommender_lock(period: int) -> bool:
+    # Held for a whole retrain period, so it doubles as the schedule.
+    return bool(
+        await read_models.set(RECOMMENDER_LOCK_KEY, "", nx=True, ex=period)
+    )
+
+
+async def acquire_similar_rebuild_lock(period: int) -> bool:
+    return bool(
+        await read_models.set(
+            SIMILAR_REBUILD_LOCK_KEY, "", nx=True, ex=period
+        )
+    )
+
+
+def principal_key(user_id: str) -> str:
+    return f"user:principal:{user_id}"
+
+
+async def get_principal(user_id: str) -> Optional[bytes]:
+    # An empty value is a tombstone and reads as a miss.
+    return await read_models.get(principal_key(user_id)) or None
+
+
+async def set_principal(user_id: str, payload: bytes) -> bool:
+    # Fills never overwrite: a fill racing a user update can't replace
+    # the update's tombstone with the row it read before the commit.
+    return bool(
+        await read_models.set(
+            principal_key(user_id), payload, ex=PRINCIPAL_EXPIRY, nx=True
+        )
+    )
+
+
+async def delete_principal(user_id: str) -> None:
+    await read_models.set(
+        principal_key(user_id), "", ex=PRINCIPAL_TOMBSTONE_EXPIRY
+    )
@@ -0,0 +1,67 @@
+import hashlib
+from typing import List, Optional
+
+from fastapi import Response, status
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(payload: bytes, version: Optional[int] = None) -> str:
+    digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    if version is not None:
+        return f'"v{version}.{digest}"'
+    return f'"{digest}"'
+
+
+def version_etag(version: int) -> str:
+    # The bare form: enough for If-Match, which only compares versions.
+    return f'"v{version}"'
+
+
+def if_match_versions(if_match: str) -> Optional[List[int]]:
+    # Versioned tags look like "v3.<digest>"; a bare "v3" is accepted too.
+    # None means "*", i.e. any current version. If-Match uses the strong
+    # comparison, so weak tags never match.
+    if if_match.strip() == "*":
+        return None
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if not (tag.startswith('"v') and tag.endswith('"')):
+            continue
+        version = tag[2:-1].split(".", 1)[0]
+        if version.isdigit():
+            versions.append(int(version))
+    return versions
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    }
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+def etag_response(
+    payload: bytes, if_none_match: Optional[str], etag: Optional[str] = None
+) -> Response:
+    etag = etag or make_etag(payload)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
@@ -1,57 +1,142 @@
-from fastapi import APIRouter, Depends
+import uuid
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, Query, status
+from fastapi.exceptions import HTTPException
+from pydantic import TypeAdapter
 from src.reviews.services import ReviewService
-from src.reviews.schemas import ReviewCreateModel
+from src.reviews.schemas import (
+    ReviewCreateModel, ReviewModel, ReviewPageModel
+)
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.db.main import get_session
-from src.db.models import User
-from src.auth.dependencies import get_current_user
+from src.db.models import Review
+from src.auth.dependencies import (
+    AccessTokenBearer, RoleChecker, get_current_user
+)
+from src.auth.schemas import UserPrincipalModel
+from src.books.streaming import export_response
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.etags import etag_response
 
 review_router = APIRouter()
 review_service = ReviewService()
+access_token_bearer = AccessTokenBearer()
+review_list_adapter = TypeAdapter(List[ReviewModel])
+admin_checker = Depends(RoleChecker(['admin'], from_claims=True))
+REVIEW_SORTS = "^(created_at|rating)$"
+
+
+def review_page_response(
+    reviews: list, next_cursor: Optional[str], if_none_match: Optional[str]
+):
+    page = ReviewPageModel(
+        items=review_list_adapter.validate_python(
+            reviews, from_attributes=True
+        ),
+        next_cursor=next_cursor,
+    )
+    return etag_response(page.model_dump_json().encode(), if_none_match)
 
 
-@review_router.post("/book/{book_id}")
+@review_router.post("/book/{book_id}", response_model=ReviewModel)
 async def create_review(
     book_id: str,
     review_data: ReviewCreateModel,
-    current_user: User = Depends(get_current_user),
+    token_details: dict = Depends(access_token_bearer),
     session: AsyncSession = Depends(get_session),
 ):
+    user_id = token_details.get('user')['user_id']
     new_review = await review_service.add_review_to_book(
         book_id=book_id,
-        user_email=current_user.email,
+        user_id=user_id,
         review_data=review_data,
-        session=session
+        session=session,
     )
     return new_review
 
 
-@review_router.get('/')
+@review_router.get('/', response_model=List[ReviewModel])
 async def retrieve_reviews(
+    if_none_match: Optional[str] = Header(default=None),
     session: AsyncSession = Depends(get_session)
 ):
     reviews = await review_service.get_reviews(session)
-    return reviews
+    payload = review_list_adapter.dump_json(
+        review_list_adapter.validate_python(reviews, from_attributes=True)
+    )
+    return etag_response(payload, if_none_match)
+
+
+@review_router.get('/book/{book_id}', response_model=ReviewPageModel)
+async def retrieve_book_reviews(
+    book_id: uuid.UUID,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query(default="created_at", pattern=REVIEW_SORTS),
+    if_none_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(get_session)
+):
+    reviews, next_cursor = await review_service.get_book_reviews(
+        book_id, session, limit=limit, cursor=cursor, sort=sort
+    )
+    return review_page_response(reviews, next_cursor, if_none_match)
+
+
+@review_router.get('/user/{user_id}', response_model=ReviewPageModel)
+async def retrieve_user_reviews(
+    user_id: uuid.UUID,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query(default="created_at", pattern=REVIEW_SORTS),
+    if_none_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(get_session)
+):
+    reviews, next_cursor = await review_service.get_user_reviews(
+        user_id, session, limit=limit, cursor=cursor, sort=sort
+    )
+    return review_page_response(reviews, next_cursor, if_none_match)
+
+
+@review_router.get('/export', dependencies=[admin_checker])
+async def export_reviews(
+    export_format: str = Query(
+        default="ndjson", alias="format", pattern="^(ndjson|csv)$"
+    ),
+):
+    return export_response(
+        select(Review.__table__), export_format, "reviews"
+    )
 
 
-@review_router.get('/{review_id}')
+@review_router.get('/{review_id}', response_model=ReviewModel)
 async def retrieve_review(
     review_id: str,
+    if_none_match: Optional[str] = Header(default=None),
     session: AsyncSession = Depends(get_session)
 ):
     review = await review_service.get_review(review_id, session)
-    return review
+    if review is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Review not found."
+        )
+    payload = ReviewModel.model_validate(
+        review, from_attributes=True
+    ).model_dump_json().encode()
+    return etag_response(payload, if_none_match)
 
 
 @review_router.delete('/{review_id}')
 async def delete_a_review(
     review_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipalModel = Depends(get_current_user),
     session: AsyncSession = Depends(get_session)
 ):
     await review_service.delete_review(
         review_id=review_id,
-        user_email=current_user.email,
+        user_id=current_user.id,
         session=session
     )
     return None
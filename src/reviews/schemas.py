@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 from sqlmodel import Field
@@ -16,6 +16,11 @@ class ReviewModel(BaseModel):
     book_id: Optional[uuid.UUID]
 
 
+class ReviewPageModel(BaseModel):
+    items: List[ReviewModel]
+    next_cursor: Optional[str] = None
+
+
 class ReviewCreateModel(BaseModel):
     rating: int = Field(lt=5)
     review_text: str
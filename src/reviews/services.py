@@ -1,53 +1,132 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import literal, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.auth.services import UserService
 from src.books.services import BookService
-from src.db.models import Review
+from src.books.trending import record_review
+from src.db.pagination import DEFAULT_PAGE_SIZE, decode_cursor, split_page
+from src.db.models import Book, BookRatingCount, Review
 from src.reviews.schemas import ReviewCreateModel
 from fastapi.exceptions import HTTPException
 from fastapi import status
 from sqlmodel import select, desc
 
-user_service = UserService()
 book_service = BookService()
 
+# Keyset columns per sort, newest first within equal ratings.
+REVIEW_SORT_KEYS = {
+    "created_at": (
+        (Review.created_at, datetime.fromisoformat),
+        (Review.id, uuid.UUID),
+    ),
+    "rating": (
+        (Review.rating, int),
+        (Review.created_at, datetime.fromisoformat),
+        (Review.id, uuid.UUID),
+    ),
+}
+
 
 class ReviewService:
+    async def _update_rating_aggregates(
+        self,
+        book_id: uuid.UUID,
+        rating: int,
+        delta: int,
+        session: AsyncSession,
+    ) -> None:
+        # Runs inside the review's transaction so the counters can never
+        # drift from the reviews table.
+        await session.exec(
+            update(Book)
+            .where(Book.id == book_id)
+            .values(
+                review_count=Book.review_count + delta,
+                rating_sum=Book.rating_sum + delta * rating,
+                version=Book.version + 1,
+            )
+        )
+        statement = insert(BookRatingCount).values(
+            book_id=book_id, rating=rating, count=max(delta, 0)
+        )
+        await session.exec(
+            statement.on_conflict_do_update(
+                index_elements=["book_id", "rating"],
+                set_={"count": BookRatingCount.count + delta},
+            )
+        )
+
     async def add_review_to_book(
         self,
         book_id: str,
-        user_email: str,
+        user_id: str,
         review_data: ReviewCreateModel,
         session: AsyncSession,
-    ):
+    ) -> dict:
+        # One statement: the review insert, the book's rating aggregates
+        # and the histogram upsert run as CTEs of the same INSERT. Missing
+        # users or books surface as foreign key violations.
         try:
-            user = await user_service.get_user_by_email(
-                email=user_email, session=session
+            book_id = uuid.UUID(book_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Book not found."
+            )
+        now = datetime.now()
+        new_review = (
+            insert(Review)
+            .values(
+                **review_data.model_dump(),
+                id=uuid.uuid4(),
+                user_id=uuid.UUID(user_id),
+                book_id=book_id,
+                created_at=now,
+                updated_at=now,
+            )
+            .returning(*Review.__table__.c)
+            .cte("new_review")
+        )
+        book_update = (
+            update(Book)
+            .where(Book.id == new_review.c.book_id)
+            .values(
+                review_count=Book.review_count + 1,
+                rating_sum=Book.rating_sum + new_review.c.rating,
+                version=Book.version + 1,
             )
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="User not found."
-                )
-            book = await book_service.get_book(book_id, session)
-            if not book:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Book not found."
-                )
-            review_data_dict = review_data.model_dump()
-            new_review = Review(**review_data_dict)
-            new_review.user = user
-            new_review.book = book
-            session.add(new_review)
+            .cte("book_update")
+        )
+        histogram = insert(BookRatingCount).from_select(
+            ["book_id", "rating", "count"],
+            select(new_review.c.book_id, new_review.c.rating, literal(1)),
+        )
+        histogram = histogram.on_conflict_do_update(
+            index_elements=["book_id", "rating"],
+            set_={"count": BookRatingCount.count + 1},
+        ).cte("histogram")
+        statement = select(*new_review.c).add_cte(book_update, histogram)
+        try:
+            result = await session.exec(statement)
+            review = result.one()
             await session.commit()
-            return new_review
-
-        except Exception as e:
+        except IntegrityError as e:
+            await session.rollback()
+            if "reviews_user_id_fkey" in str(e.orig):
+                detail = "User not found."
+            else:
+                detail = "Book not found."
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Oops.... something went wrong. {e}",
+                status_code=status.HTTP_404_NOT_FOUND, detail=detail
             )
+        await book_service.refresh_book_details([book_id], session)
+        await record_review(book_id)
+        return review._asdict()
 
     async def get_review(self, review_id: str, session: AsyncSession):
         statement = select(Review).where(Review.id == review_id)
@@ -59,16 +138,71 @@ class ReviewService:
         result = await session.exec(statement)
         return result.all()
 
+    async def _get_review_page(
+        self,
+        condition,
+        session: AsyncSession,
+        limit: int,
+        cursor: Optional[str],
+        sort: str,
+    ):
+        keys = REVIEW_SORT_KEYS[sort]
+        columns = [column for column, _ in keys]
+        # Plain columns: no user/book relationships are loaded.
+        statement = select(*Review.__table__.c).where(condition)
+        if cursor is not None:
+            values = decode_cursor(cursor, *(parse for _, parse in keys))
+            statement = statement.where(tuple_(*columns) < values)
+        statement = statement.order_by(
+            *(desc(column) for column in columns)
+        ).limit(limit + 1)
+        result = await session.exec(statement)
+        return split_page(
+            result.all(),
+            limit,
+            lambda row: tuple(getattr(row, column.key) for column in columns),
+        )
+
+    async def get_book_reviews(
+        self,
+        book_id: uuid.UUID,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        sort: str = "created_at",
+    ):
+        return await self._get_review_page(
+            Review.book_id == book_id, session, limit, cursor, sort
+        )
+
+    async def get_user_reviews(
+        self,
+        user_id: uuid.UUID,
+        session: AsyncSession,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        sort: str = "created_at",
+    ):
+        return await self._get_review_page(
+            Review.user_id == user_id, session, limit, cursor, sort
+        )
+
     async def delete_review(
-        self, review_id: str, user_email: str, session: AsyncSession
+        self, review_id: str, user_id: uuid.UUID, session: AsyncSession
     ):
-        user = await user_service.get_user_by_email(user_email, session)
-        print("User -->", user.id)
         review = await self.get_review(review_id, session)
-        if not review or (review.user_id != user.id):
+        if not review or (review.user_id != user_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Cannot delete this review"
             )
         await session.delete(review)
+        if review.book_id is not None:
+            await self._update_rating_aggregates(
+                review.book_id, review.rating, -1, session
+            )
         await session.commit()
+        if review.book_id is not None:
+            await book_service.refresh_book_details(
+                [review.book_id], session
+            )
@@ -1,16 +1,31 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Query, status
+from pydantic import TypeAdapter
 from src.tags.services import TagService
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.db.main import get_session
-from src.tags.schemas import TagModel, TagAddModel, TagCreateModel
-from typing import List
+from src.tags.schemas import (
+    TagAddModel,
+    TagBulkAttachModel,
+    TagBulkAttachResultModel,
+    TagCreateModel,
+    TagModel,
+)
+from typing import List, Optional
 from src.auth.dependencies import RoleChecker
 from src.books.schemas import Book
+from src.books.streaming import export_response
+from src.db.models import Tag
+from src.etags import etag_response
 
 
 tags_router = APIRouter()
 tag_service = TagService()
-role_checker = Depends(RoleChecker(['admin', 'user']))
+role_checker = Depends(
+    RoleChecker(['admin', 'user'], from_claims=True)
+)
+admin_checker = Depends(RoleChecker(['admin'], from_claims=True))
+tag_list_adapter = TypeAdapter(List[TagModel])
 
 
 @tags_router.get(
@@ -19,10 +34,23 @@ role_checker = Depends(RoleChecker(['admin', 'user']))
     dependencies=[role_checker]
 )
 async def retreive_tags(
+    if_none_match: Optional[str] = Header(default=None),
     session: AsyncSession = Depends(get_session)
 ):
     tags = await tag_service.get_tags(session=session)
-    return tags
+    payload = tag_list_adapter.dump_json(
+        tag_list_adapter.validate_python(tags, from_attributes=True)
+    )
+    return etag_response(payload, if_none_match)
+
+
+@tags_router.get('/export', dependencies=[admin_checker])
+async def export_tags(
+    export_format: str = Query(
+        default="ndjson", alias="format", pattern="^(ndjson|csv)$"
+    ),
+):
+    return export_response(select(Tag.__table__), export_format, "tags")
 
 
 @tags_router.post(
@@ -60,6 +88,21 @@ async def add_tags_to_book(
     return book_with_tag
 
 
+@tags_router.post(
+    '/bulk-attach',
+    response_model=TagBulkAttachResultModel,
+    dependencies=[role_checker]
+)
+async def bulk_attach_tags(
+    attach_data: TagBulkAttachModel,
+    session: AsyncSession = Depends(get_session)
+) -> TagBulkAttachResultModel:
+    return await tag_service.bulk_attach_tags(
+        attach_data=attach_data,
+        session=session
+    )
+
+
 @tags_router.put(
     '/{tag_id}',
     response_model=TagModel,
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import uuid
 from datetime import datetime
 from typing import List
@@ -16,3 +16,15 @@ class TagCreateModel(BaseModel):
 
 class TagAddModel(BaseModel):
     tags: List[TagCreateModel]
+
+
+class TagBulkAttachModel(BaseModel):
+    book_ids: List[uuid.UUID] = Field(min_length=1, max_length=1000)
+    tags: List[TagCreateModel] = Field(min_length=1, max_length=100)
+
+
+class TagBulkAttachResultModel(BaseModel):
+    books: int
+    tags: int
+    links_created: int
+    missing_book_ids: List[uuid.UUID]
@@ -1,11 +1,23 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List
+
 from fastapi import status
+import sqlalchemy.dialects.postgresql as pg
 from fastapi.exceptions import HTTPException
+from sqlalchemy import func, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import desc, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.books.autocomplete import book_index
 from src.books.services import BookService
-from src.db.models import Tag
-from src.tags.schemas import TagAddModel, TagCreateModel
+from src.books.similarity import refresh_similar_books
+from src.db.models import BookTag, Tag
+from src.tags.schemas import (
+    TagAddModel, TagBulkAttachModel, TagBulkAttachResultModel, TagCreateModel
+)
 
 book_service = BookService()
 
@@ -21,27 +33,112 @@ class TagService:
         result = await session.exec(statement)
         return result.first()
 
+    async def _get_tag_ids(
+        self, names: List[str], session: AsyncSession
+    ) -> Dict[str, uuid.UUID]:
+        result = await session.exec(
+            select(Tag.id, Tag.name).where(Tag.name.in_(names))
+        )
+        return {name: tag_id for tag_id, name in result.all()}
+
+    async def _attach_tags(
+        self,
+        book_ids: List[uuid.UUID],
+        names: List[str],
+        session: AsyncSession,
+    ) -> int:
+        # One IN lookup, one upsert for the names that were missing and
+        # one insert for the links, regardless of tag count.
+        names = list(dict.fromkeys(names))
+        tag_ids = await self._get_tag_ids(names, session)
+        missing = [name for name in names if name not in tag_ids]
+        created = []
+        if missing:
+            now = datetime.now()
+            result = await session.exec(
+                insert(Tag)
+                .values([
+                    {"id": uuid.uuid4(), "name": name, "created_at": now}
+                    for name in missing
+                ])
+                .on_conflict_do_nothing(index_elements=["name"])
+                .returning(Tag.id, Tag.name)
+            )
+            created = result.all()
+            tag_ids.update({name: tag_id for tag_id, name in created})
+            raced = [name for name in missing if name not in tag_ids]
+            if raced:
+                tag_ids.update(await self._get_tag_ids(raced, session))
+
+        links_created = 0
+        if book_ids and tag_ids:
+            # The book x tag product is formed by Postgres from two array
+            # parameters; a row per link would exceed the 32767 bind
+            # parameter limit at the maximum bulk request size.
+            books = func.unnest(
+                literal(book_ids, pg.ARRAY(pg.UUID))
+            ).table_valued("book_id").render_derived()
+            tags = func.unnest(
+                literal(list(tag_ids.values()), pg.ARRAY(pg.UUID))
+            ).table_valued("tag_id").render_derived()
+            result = await session.exec(
+                insert(BookTag)
+                .from_select(
+                    ["book_id", "tag_id"],
+                    select(books.c.book_id, tags.c.tag_id),
+                )
+                .on_conflict_do_nothing()
+                .returning(BookTag.book_id)
+            )
+            linked = [book_id for book_id, in result.all()]
+            links_created = len(linked)
+            await book_service.bump_versions(linked, session)
+        await session.commit()
+        for _, name in created:
+            book_index.add("tag", name)
+        await book_service.refresh_book_details(book_ids, session)
+        if links_created:
+            await refresh_similar_books(book_ids, session)
+        return links_created
+
     async def add_tags_to_book(
         self, book_id: str, tag_data: TagAddModel, session: AsyncSession
     ):
-        book = await book_service.get_book(book_id=book_id, session=session)
-        if not book:
+        try:
+            book_id = uuid.UUID(book_id)
+        except ValueError:
+            book_id = None
+        books = []
+        if book_id is not None:
+            books = await book_service.get_books_by_ids([book_id], session)
+        if not books:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="Book not found."
             )
-        for tag_item in tag_data.tags:
-            result = await session.exec(
-                select(Tag).where(Tag.name == tag_item.name)
-            )
-            tag = result.one_or_none()
-            if not tag:
-                tag = Tag(name=tag_item.name)
-            book.tags.append(tag)
+        await self._attach_tags(
+            [book_id], [tag.name for tag in tag_data.tags], session
+        )
+        return books[0]
 
-        session.add(book)
-        await session.commit()
-        await session.refresh(book)
-        return book
+    async def bulk_attach_tags(
+        self, attach_data: TagBulkAttachModel, session: AsyncSession
+    ) -> TagBulkAttachResultModel:
+        requested = list(dict.fromkeys(attach_data.book_ids))
+        books = await book_service.get_books_by_ids(
+            requested, session, fields=["id"]
+        )
+        found = {book.id for book in books}
+        book_ids = [book_id for book_id in requested if book_id in found]
+        names = [tag.name for tag in attach_data.tags]
+        links_created = await self._attach_tags(book_ids, names, session)
+        return TagBulkAttachResultModel(
+            books=len(book_ids),
+            tags=len(set(names)),
+            links_created=links_created,
+            missing_book_ids=[
+                book_id for book_id in requested if book_id not in found
+            ],
+        )
 
     async def add_tag(self, tag_data: TagCreateModel, session: AsyncSession):
         statement = select(Tag).where(Tag.name == tag_data.name)
@@ -55,7 +152,16 @@ class TagService:
             )
         new_tag = Tag(name=tag_data.name)
         session.add(new_tag)
-        await session.commit()
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent insert of the same name.
+            await session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Tag already exists"
+            )
+        book_index.add("tag", new_tag.name)
         return new_tag
 
     async def update_tag(
@@ -67,11 +173,25 @@ class TagService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Tag not found"
             )
+        old_name = tag.name
+        book_ids = [book.id for book in tag.books]
         tag_dict = tag_data.model_dump()
         for k, v in tag_dict.items():
             setattr(tag, k, v)
+        try:
+            # The bump flushes the rename, so it can raise as well.
+            await book_service.bump_versions(book_ids, session)
             await session.commit()
-            await session.refresh(tag)
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Tag already exists"
+            )
+        await session.refresh(tag)
+        book_index.remove("tag", old_name)
+        book_index.add("tag", tag.name)
+        await book_service.refresh_book_details(book_ids, session)
         return tag
 
     async def delete_tag(self, tag_id: str, session: AsyncSession):
@@ -81,6 +201,10 @@ class TagService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Tag not found"
             )
+        book_ids = [book.id for book in tag.books]
         await session.delete(tag)
+        await book_service.bump_versions(book_ids, session)
         await session.commit()
+        book_index.remove("tag", tag.name)
+        await book_service.refresh_book_details(book_ids, session)
         return None